@@ -0,0 +1,34 @@
+""" Reader for the Yale Bright Star Catalog binary (BSC5): ~9,100 naked-eye stars, available in milliseconds """
+import numpy as np
+
+MAS_PER_RADIAN = np.degrees(1.0) * 3600 * 1000
+
+def read_bsc5(path: str) -> dict:
+    # 28 byte header: STAR0, STAR1, STARN, STNUM, MPROP, NMAG, NBENT
+    byte_order = '<'
+    header = np.fromfile(path, dtype='<i4', count=7)
+    if header[6] != 32:
+        byte_order = '>'
+        header = header.byteswap()
+    star_count = abs(int(header[2])) # negative when coordinates are J2000
+
+    entry = np.dtype([
+        ('XNO', byte_order + 'f4'), # catalog (HR) number
+        ('SRA0', byte_order + 'f8'), # radians
+        ('SDEC0', byte_order + 'f8'),
+        ('IS', 'S2'), # spectral type
+        ('MAG', byte_order + 'i2'), # V magnitude * 100
+        ('XRPM', byte_order + 'f4'), # radians per year
+        ('XDPM', byte_order + 'f4')
+    ])
+    entries = np.fromfile(path, dtype=entry, count=star_count, offset=28)
+    entries = entries[(entries['SRA0'] != 0) | (entries['SDEC0'] != 0)] # withdrawn entries have no position
+
+    return {
+        'HR': entries['XNO'].astype(np.int32),
+        'RAdeg': np.degrees(entries['SRA0']),
+        'DEdeg': np.degrees(entries['SDEC0']),
+        'Vmag': entries['MAG'] / 100.0,
+        'pmRA': entries['XRPM'] * MAS_PER_RADIAN, # mas/yr, already scaled by cos(Dec)
+        'pmDE': entries['XDPM'] * MAS_PER_RADIAN
+    }
@@ -1,16 +1,42 @@
 import time
 import os
+import threading
+from functools import partial
 import numpy as np
-from utils import BASE_DIR, is_within_radius, radec_to_altaz
+from utils import BASE_DIR, is_within_radius, radec_to_unit_vectors
 from astropy.table import Table
 from skyfield.api import load
 from observation_context import Environment
 from skyfield.positionlib import ICRF
+from astronomy.sky_grid import SkyGrid
+from astronomy.name_index import named_rows
+from astronomy.star_table import StarTable
+from astronomy.bsc5 import read_bsc5
+from astronomy.paged_tier import PagedTier, write_pages
+from astronomy.epoch import julian_year, observing_date
+from astronomy.kernels import excerpt_path, covers
+from astronomy.minor_bodies import MinorBodies, load_elements, elements_path
+from astronomy.columnar import write_columns, read_columns, has_columns
+from astronomy.targets import Targets, STAR, DSO, PLANET, MINOR_BODY
+from astronomy.visibility import VisibilityTable, TargetVisibility
+from astronomy.ephemeris import SolarSystemEphemeris, EphemerisCache, get_planet, get_planet_magnitude
 
 catalog_file = os.path.normpath(os.path.join(BASE_DIR, 'data', 'tyc.fits'))
+columnar_dir = os.path.normpath(os.path.join(BASE_DIR, 'data', 'tyc')) # built from catalog_file by convert_catalog()
 ephemeris_file = os.path.join(BASE_DIR, 'data', "de440s.bsp")
 asteroids_file = os.path.join(BASE_DIR, 'data', "sb441-n16.bsp")
-PLANET_NAMES = ["MERCURY", "VENUS", "MARS", "JUPITER", "SATURN", "URANUS", "NEPTUNE", "PLUTO", "SUN", "MOON"]
+minor_bodies_file = os.path.join(BASE_DIR, 'data', "MPCORB.DAT") # optional, MPC orbital elements
+bright_star_file = os.path.join(BASE_DIR, 'BSC5') # Yale Bright Star Catalog, served while the Tycho catalog loads
+STAR_COLUMNS = ['RAdeg', 'DEdeg', 'TYC', 'Vmag', 'Name']
+PM_COLUMNS = ['pmRA', 'pmDE'] # optional, mas/yr; kept when the FITS build includes them
+INDEX_COLUMNS = ['format', 'vectors', 'grid_order', 'grid_start', 'named_rows', 'dso_rows'] # derived once, stored next to the columns
+MENU_MAG_LIMIT = 10 # deepest magnitude filter offered by the target menu
+DSO_MAG_LIMIT = 15
+COLUMNAR_FORMAT = 3 # bump when the layout changes so stale conversions are ignored
+BRIGHT_MAG_LIMIT = 6.5 # BSC5 is complete to about here
+RESIDENT_MAG_LIMIT = 9.0 # fainter rows are read from region pages on demand
+TYCHO_EPOCH = 1991.25 # Tycho positions are ICRS at the Hipparcos mean epoch
+BSC5_EPOCH = 2000.0
 
 def alphabetical(targets):
     targets.sort(key=lambda x: str(x['Name']).upper() if x['Name'] is not None else 'ZZZZZ')
@@ -30,31 +56,130 @@ def clean(n) -> str:
     n = n[0].upper() + n[1:]
     return n.lower()
 
-def get_planet_magnitude(planet_name):
-    magnitudes = {
-        'MERCURY': 0.0,
-        'VENUS': -4.0,
-        'MARS': 0.5,
-        'JUPITER': -2.5,
-        'SATURN': 0.5,
-        'URANUS': 5.5,
-        'NEPTUNE': 8.0,
-        'PLUTO': 14.0,
-        'SUN': -26.8,
-        'MOON': -12.6
+def sort_by_magnitude(stars):
+    # Brightest first (unknown magnitudes last), so a magnitude limit is always a prefix of the rows
+    return stars[np.argsort(np.ma.filled(stars['Vmag'], np.nan), kind='stable')]
+
+def derive_indexes(stars) -> dict:
+    ra = np.ma.filled(stars['RAdeg'], np.nan)
+    dec = np.ma.filled(stars['DEdeg'], np.nan)
+    grid = SkyGrid(ra, dec)
+    tyc = np.ma.filled(stars['TYC'], '')
+    return {
+        'format': np.array([COLUMNAR_FORMAT]),
+        'vectors': radec_to_unit_vectors(ra, dec),
+        'grid_order': grid.order,
+        'grid_start': grid.cell_start,
+        'named_rows': named_rows(stars['Name']),
+        'dso_rows': np.nonzero(np.char.startswith(tyc, b'M' if tyc.dtype.kind == 'S' else 'M'))[0] # Messier objects
     }
-    return magnitudes.get(planet_name, 7.0)
+
+def columnar_is_current() -> bool:
+    if not has_columns(columnar_dir, STAR_COLUMNS + INDEX_COLUMNS):
+        return False
+    if int(read_columns(columnar_dir, ['format'])['format'][0]) != COLUMNAR_FORMAT:
+        print("Columnar catalog is from an older format, re-run the conversion.")
+        return False
+    if not os.path.exists(catalog_file):
+        return True
+    # FITS stays the source of truth, ignore a conversion older than it
+    return os.path.getmtime(os.path.join(columnar_dir, 'RAdeg.npy')) >= os.path.getmtime(catalog_file)
+
+def convert_catalog(source: str = catalog_file, directory: str = columnar_dir):
+    print(f"Converting {source} to columnar catalog in {directory}...", end=' ')
+    start = time.time()
+    stars = Table.read(source)
+    columns = STAR_COLUMNS + [name for name in PM_COLUMNS if name in stars.colnames]
+    stars = sort_by_magnitude(stars[columns])
+    write_columns(directory, derive_indexes(stars))
+    write_columns(directory, {name: stars[name] for name in columns})
+    ra, dec, vmag = (np.ma.filled(stars[name], np.nan) for name in ['RAdeg', 'DEdeg', 'Vmag'])
+    pm_ra, pm_dec = (np.ma.filled(stars[name], np.nan) if name in columns else None for name in PM_COLUMNS)
+    first_row = int(np.searchsorted(vmag, RESIDENT_MAG_LIMIT, side='right'))
+    write_pages(directory, ra, dec, vmag, first_row, pm_ra=pm_ra, pm_dec=pm_dec, epoch=TYCHO_EPOCH)
+    print(f"Done in {time.time() - start:.2f} seconds")
 
 def load_stars():
     try:
-        print("Loading Tycho catalog...", end=' ')
         start = time.time()
-        stars = Table.read(catalog_file)
+        if columnar_is_current():
+            print("Opening columnar Tycho catalog...", end=' ')
+            star_columns = STAR_COLUMNS + (PM_COLUMNS if has_columns(columnar_dir, PM_COLUMNS) else [])
+            columns = read_columns(columnar_dir, star_columns + INDEX_COLUMNS)
+            stars = Table({name: columns[name] for name in star_columns}, copy=False) # stays memory-mapped
+            indexes = {name: columns[name] for name in INDEX_COLUMNS}
+        else:
+            print("Loading Tycho catalog...", end=' ')
+            stars = sort_by_magnitude(Table.read(catalog_file))
+            indexes = derive_indexes(stars)
         print(f"Done in {time.time() - start:.2f} seconds")
-        return stars
+        return stars, indexes
     except Exception as e:
         print(f"Error loading stars catalog: {e}")
-        return []
+        return [], {}
+
+def load_pages():
+    layout = os.path.join(columnar_dir, 'pages', 'layout.npy')
+    if not os.path.exists(layout) or not columnar_is_current():
+        return None
+    if os.path.getmtime(layout) < os.path.getmtime(os.path.join(columnar_dir, 'RAdeg.npy')):
+        return None # pages from an earlier conversion
+    try:
+        return PagedTier(columnar_dir)
+    except Exception as e:
+        print(f"Error opening catalog pages: {e}")
+        return None
+
+def load_kernel(path: str, t):
+    """ Open the trimmed excerpt of a kernel when it covers t, the full kernel otherwise """
+    excerpt = excerpt_path(path)
+    if os.path.exists(excerpt):
+        try:
+            kernel = load(excerpt)
+            if covers(kernel, float(t.tt)):
+                return kernel
+            kernel.close()
+            print(f"{excerpt} does not cover today, re-run python -m astronomy.kernels")
+        except Exception as e:
+            print(f"Error opening {excerpt}: {e}")
+    return load(path)
+
+def load_minor_bodies():
+    if not os.path.exists(elements_path(minor_bodies_file)):
+        if os.path.exists(minor_bodies_file):
+            print(f"{minor_bodies_file} is not converted yet, run python -m astronomy.minor_bodies")
+        return None
+    try:
+        start = time.time()
+        print("Loading minor planet elements...", end=' ')
+        bodies = MinorBodies(load_elements(minor_bodies_file))
+        print(f"{len(bodies)} bodies in {time.time() - start:.2f} seconds")
+        return bodies
+    except Exception as e:
+        print(f"Error loading minor planet elements: {e}")
+        return None
+
+def load_bright_stars():
+    try:
+        start = time.time()
+        print("Loading bright star catalog...", end=' ')
+        bsc = read_bsc5(bright_star_file)
+        hr = np.char.add('HR ', bsc['HR'].astype(str)) # BSC5 carries no proper names
+        stars = sort_by_magnitude(Table({
+            'RAdeg': bsc['RAdeg'],
+            'DEdeg': bsc['DEdeg'],
+            'TYC': hr,
+            'Vmag': bsc['Vmag'],
+            'Name': hr,
+            'pmRA': bsc['pmRA'],
+            'pmDE': bsc['pmDE']
+        }))
+        indexes = derive_indexes(stars)
+        print(f"Done in {time.time() - start:.2f} seconds")
+        return stars, indexes
+    except Exception as e:
+        print(f"Error loading bright star catalog: {e}")
+        return None, {}
 
 class Catalog:
 
@@ -65,33 +190,84 @@ class Catalog:
         self.setup()
     
     def load(self):
-        self.stars: Table = load_stars()
-        self.planets: dict = load(ephemeris_file)
-        self.asteroids: dict = load(asteroids_file)
+        self.ready = threading.Event() # set once the full Tycho catalog has replaced the bright tier
+        self.loader = None
+        stars, indexes = load_bright_stars()
+        if stars is None:
+            self.load_full_catalog() # no bright tier to serve from, wait for the full catalog
+            if not self.ready.is_set():
+                raise RuntimeError(f"No star catalog could be loaded from {catalog_file} or {bright_star_file}")
+        else:
+            self.tier = StarTable(stars, indexes, clean, BRIGHT_MAG_LIMIT, epoch=BSC5_EPOCH)
+            self.propagate(self.tier)
+        self.planets: dict = load_kernel(ephemeris_file, self.env.time)
+        self.asteroids: dict = load_kernel(asteroids_file, self.env.time)
+        self.minor_bodies = load_minor_bodies()
 
     def setup(self):
         self.earth = self.planets["EARTH"]
         self.topocentric = self.earth + self.env.skyfield_location
-        self.planet_cache = {}
-        self.cache_time = None
-        self.cache_duration = 3
-
-    def search_by_name(self, n: str, clean: bool = True): # only for dsos
-        if clean:
-            n = clean(n)
-        name_col = self.stars['Name'].filled('')
-        name_strings = np.array([clean(n) for n in name_col])
-
-        results = self.stars[name_strings == n]
-        return results
-
-    def search_by_coordinate(self, ra: float, dec: float, radius: float = 0.05, mag_limit: float = 13): # FOV in degrees
-        within_radius = is_within_radius(ra, dec, self.stars['RAdeg'], self.stars['DEdeg'], radius)
-        star_results = self.stars[within_radius]
-        star_results = star_results[star_results['Vmag'] <= mag_limit]
-
-        planets_in_fov = self.get_planets_in_fov(ra, dec, radius)
-        return self.build_targets(star_results, planets_in_fov)
+        self.ephemeris = SolarSystemEphemeris(self.planets, self.asteroids, self.topocentric, self.asteroid_names(), self.minor_bodies)
+        self.ephemeris.update_magnitudes(self.env.time)
+        self.ephemeris_cache = EphemerisCache(self.ephemeris)
+        self.ephemeris_cache.refresh(self.env.time) # sample tonight in the background
+
+        # Menu order: every kernel body, plus the orbital-element bodies bright enough tonight
+        in_menu = np.arange(len(self.ephemeris.names)) < self.ephemeris.kernel_bodies
+        in_menu |= self.ephemeris.magnitudes <= MENU_MAG_LIMIT
+        menu = np.nonzero(in_menu)[0]
+        self.solar_order = menu[np.argsort([self.ephemeris.names[i].upper() for i in menu], kind='stable')]
+
+        self.visibility = TargetVisibility(self.build_visibility_tables, self.env, self.moving_positions)
+        self.visibility.start()
+        if not self.ready.is_set():
+            self.loader = threading.Thread(target=self.load_full_catalog, daemon=True)
+            self.loader.start()
+
+    def load_full_catalog(self):
+        stars, indexes = load_stars()
+        if len(stars) == 0:
+            return # keep serving the bright tier
+        tier = StarTable(stars, indexes, clean, pages=load_pages(), epoch=TYCHO_EPOCH)
+        self.propagate(tier) # before the swap, so queries never see catalog-epoch positions
+        self.tier = tier # single assignment, readers hold on to whichever tier they started with
+        self.ready.set()
+        if hasattr(self, 'visibility'):
+            self.visibility.rebuild()
+
+    def propagate(self, tier: StarTable):
+        tier.propagate(julian_year(self.env.time), observing_date(self.env.time)) # cached per date
+
+    @property
+    def stars(self):
+        return self.tier.stars
+
+    def search_by_name(self, n: str, mode: str = "exact", limit: int = None): # mode: exact, prefix or fuzzy
+        if self.loader is not None:
+            self.loader.join() # proper names only exist in the full catalog
+        tier = self.tier
+        self.propagate(tier)
+        return tier.search_by_name(n, mode, limit)
+
+    def cone_search(self, ra: float, dec: float, radius: float, mag_limit: float = None) -> np.ndarray: # row indices within radius degrees
+        tier = self.tier
+        self.propagate(tier)
+        return tier.cone_search(ra, dec, radius, mag_limit)
+
+    def search_by_coordinate(self, ra: float, dec: float, radius: float = 0.05, mag_limit: float = 13) -> Targets: # FOV in degrees
+        tier = self.tier
+        self.propagate(tier)
+        rows, star_ra, star_dec, star_vmag = tier.cone(ra, dec, radius, mag_limit)
+        stars = Targets.from_arrays(star_ra, star_dec, star_vmag, np.where(np.isin(rows, tier.dso_rows), DSO, STAR), rows)
+        return Targets.concatenate([stars, self.bodies_in_fov(ra, dec, radius, mag_limit)], partial(self.resolve_name, tier=tier))
+
+    def display_name(self, row: int) -> str:
+        return self.tier.display_name(row)
+
+    def resolve_name(self, kind: int, index: int, tier: StarTable = None) -> str:
+        if kind in (STAR, DSO):
+            return (tier or self.tier).display_name(index)
+        return self.ephemeris.names[index]
     
     def build_targets(self, stars, ephem):
         combined = []
@@ -118,25 +294,20 @@ class Catalog:
         return self.topocentric.at(self.env.time)
 
     def get_planet(self, planet_name: str):
-        planet_name = planet_name.upper()
-        if f'{planet_name} BARYCENTER' in self.planets:
-            return self.planets[f'{planet_name} BARYCENTER']
-        return self.planets[planet_name]
+        return get_planet(self.planets, planet_name)
+
+    def asteroid_names(self) -> dict:
+        names = {}
+        for target_id, name in self.asteroids.names().items():
+            if target_id == 10:
+                continue # Skip Sun!
+            if name is None or clean(name) == '':
+                continue
+            names[target_id] = clean(name)
+        return names
     
     def get_current_positions(self):
-        positions = {}
-        
-        for planet_name in PLANET_NAMES:
-            positions[planet_name] = self.get_current_position(planet_name)
-        
-        for target_id in self.asteroids.names():
-            if target_id == 10: 
-                continue # Skip Sun!
-            asteroid_position = self.get_current_position_asteroid(target_id)
-            if asteroid_position:
-                positions[asteroid_position['Name']] = asteroid_position
-        
-        return positions
+        return self.ephemeris_cache.positions(self.env.time)
     
     def get_current_position(self, planet_name: str):
         try:
@@ -186,76 +357,79 @@ class Catalog:
         
         return None
 
+    def bodies_in_fov(self, ra, dec, radius, mag_limit: float = None) -> Targets:
+        # Interpolated from the nightly cache, then filtered as arrays
+        body_ra, body_dec = self.ephemeris_cache.radec(self.env.time)
+        magnitudes = self.ephemeris.magnitudes
+        keep = is_within_radius(ra, dec, body_ra, body_dec, radius)
+        if mag_limit is not None: # kernel bodies are always shown, orbital-element bodies only when bright enough
+            keep &= (np.arange(len(keep)) < self.ephemeris.kernel_bodies) | (magnitudes <= mag_limit)
+        index = np.nonzero(keep)[0]
+        kind = np.where(index < len(self.ephemeris.planet_names), PLANET, MINOR_BODY)
+        return Targets.from_arrays(body_ra[index], body_dec[index], magnitudes[index], kind, index, self.resolve_name)
+
     def get_planets_in_fov(self, ra, dec, radius):
-        current_time = time.time()
-        
-        # Check planet cache
-        if (self.cache_time is None or 
-            current_time - self.cache_time > self.cache_duration or
-            not self.planet_cache):
+        bodies = self.bodies_in_fov(ra, dec, radius)
+        return [bodies[i] for i in range(len(bodies))]
 
-            self.planet_cache = self.get_current_positions()
-            self.cache_time = current_time
+    def solar_system_targets(self, ra: np.ndarray, dec: np.ndarray) -> list: # alphabetical, like the menu
+        return [{
+            'Name': self.ephemeris.names[i],
+            'RAdeg': ra[i],
+            'DEdeg': dec[i],
+            'Vmag': self.ephemeris.magnitudes[i],
+            'is_planet': True
+        } for i in self.solar_order]
 
-        # Filter planets within FOV
-        planets_in_fov = []
-        
-        for planet_name, planet_data in self.planet_cache.items():
-            if is_within_radius(ra, dec, planet_data['RAdeg'], planet_data['DEdeg'], radius):
-                planets_in_fov.append(planet_data)
-        
-        return planets_in_fov
+    def build_visibility_tables(self) -> dict:
+        tier = self.tier
+        self.propagate(tier)
+        ra, dec = self.ephemeris_cache.radec(self.env.time)
+        return {
+            'stars': VisibilityTable(alphabetical(self.build_targets(tier.rows(tier.bright_star_rows(MENU_MAG_LIMIT)), [])), min(MENU_MAG_LIMIT, tier.mag_limit)),
+            'dsos': VisibilityTable(alphabetical(self.build_targets(tier.rows(tier.bright_dso_rows(DSO_MAG_LIMIT)), [])), min(DSO_MAG_LIMIT, tier.mag_limit)),
+            'solar': VisibilityTable(self.solar_system_targets(ra, dec), np.inf)
+        }
 
-    def get_bright_stars(self, mag_limit=6):
-        tycho = self.stars
-        stars = tycho[(tycho['Vmag'] <= mag_limit) & (tycho['Name'].filled('') != '') & ~(np.char.startswith(tycho['TYC'].astype(str), 'M'))]
-        targets = self.build_targets(stars, [])
+    def moving_positions(self) -> dict:
+        ra, dec = self.ephemeris_cache.radec(self.env.time)
+        return {'solar': (ra[self.solar_order], dec[self.solar_order])}
+
+    def visible_targets(self, targets: list) -> list: # direct computation, used until the tables are ready
         ra_values = [target['RAdeg'] for target in targets]
         dec_values = [target['DEdeg'] for target in targets]
-        alts, azs = radec_to_altaz(ra_values, dec_values, self.env.astropy_time(), self.env.astropy_location)
+        alts, azs = self.env.horizon().altaz(ra_values, dec_values)
 
         mask = alts > self.env.min_visible_altitude
-        targets = [targets[i] for i in range(len(targets)) if mask[i]]
+        return [targets[i] for i in range(len(targets)) if mask[i]]
+
+    def get_bright_stars(self, mag_limit=6):
+        table = self.visibility.get('stars', mag_limit)
+        if table is not None:
+            return table.visible(self.env.min_visible_altitude, mag_limit)
 
-        return alphabetical(targets)
+        tier = self.tier # the bright tier until the full catalog is loaded
+        self.propagate(tier)
+        targets = self.build_targets(tier.rows(tier.bright_star_rows(mag_limit)), [])
+        return alphabetical(self.visible_targets(targets))
     
     def get_dsos(self, mag_limit=15):
-        tycho = self.stars
-        dsos = tycho[(tycho['Vmag'] <= mag_limit) & (np.char.startswith(tycho['TYC'].astype(str), 'M'))]
-        targets = self.build_targets(dsos, [])
-        ra_values = [target['RAdeg'] for target in targets]
-        dec_values = [target['DEdeg'] for target in targets]
-        alts, azs = radec_to_altaz(ra_values, dec_values, self.env.astropy_time(), self.env.astropy_location)
-        mask = alts > self.env.min_visible_altitude
-        targets = [targets[i] for i in range(len(targets)) if mask[i]]
+        table = self.visibility.get('dsos', mag_limit)
+        if table is not None:
+            return table.visible(self.env.min_visible_altitude, mag_limit)
 
-        return alphabetical(targets)
+        tier = self.tier
+        self.propagate(tier)
+        targets = self.build_targets(tier.rows(tier.bright_dso_rows(mag_limit)), [])
+        return alphabetical(self.visible_targets(targets))
 
     def get_solar_system(self):
-        positions_dict = self.get_current_positions()
-        
-        # Convert dictionary to list of dictionaries
-        if isinstance(positions_dict, dict):
-            targets_list = []
-            for name, data in positions_dict.items():
-                planet_dict = {
-                    'Name': name,
-                    'RAdeg': data['RAdeg'],
-                    'DEdeg': data['DEdeg'],
-                    'Vmag': data.get('Vmag', 5.0),  # Default magnitude if not provided
-                    'is_planet': True
-                }
-                targets_list.append(planet_dict)
-        else:
-            targets_list = positions_dict  # Already a list
-        
-        targets = self.build_targets([], targets_list)
+        table = self.visibility.get('solar')
+        if table is not None:
+            return table.visible(self.env.min_visible_altitude)
 
-        ra_values = [target['RAdeg'] for target in targets]
-        dec_values = [target['DEdeg'] for target in targets]
-        alts, azs = radec_to_altaz(ra_values, dec_values, self.env.astropy_time(), self.env.astropy_location)
-
-        mask = alts > self.env.min_visible_altitude
-        targets = [targets[i] for i in range(len(targets)) if mask[i]]
+        ra, dec = self.ephemeris_cache.radec(self.env.time)
+        return self.visible_targets(self.solar_system_targets(ra, dec))
 
-        return alphabetical(targets)
\ No newline at end of file
+if __name__ == "__main__":
+    convert_catalog()
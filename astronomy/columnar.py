@@ -0,0 +1,18 @@
+""" Columnar on-disk tables: one .npy file per column, opened memory-mapped so only touched pages are read """
+import os
+import numpy as np
+
+def write_columns(directory: str, columns: dict):
+    os.makedirs(directory, exist_ok=True)
+    for name, values in columns.items():
+        values = np.ma.filled(values, '' if np.asarray(values).dtype.kind in 'SU' else np.nan) if np.ma.isMaskedArray(values) else np.asarray(values)
+        # Write to a temporary file first so a half-written column is never picked up at boot
+        path = os.path.join(directory, f"{name}.npy")
+        np.save(path + ".tmp.npy", np.ascontiguousarray(values))
+        os.replace(path + ".tmp.npy", path)
+
+def has_columns(directory: str, names: list) -> bool:
+    return all(os.path.exists(os.path.join(directory, f"{name}.npy")) for name in names)
+
+def read_columns(directory: str, names: list) -> dict:
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in names}
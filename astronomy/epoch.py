@@ -0,0 +1,37 @@
+""" Proper motion: catalog positions moved to the observing date, vectorized over whole catalogs.
+
+Positions stay in ICRS so they still compare directly with plate solves; precession and nutation to the
+equator of date are applied later, by HorizonFrame, only where alt/az is needed. """
+import numpy as np
+from skyfield.api import Time
+
+MAS_TO_RADIANS = np.radians(1.0 / 3.6e6)
+J2000 = 2451545.0
+
+def julian_year(t: Time) -> float:
+    return 2000.0 + (float(t.tt) - J2000) / 365.25
+
+def observing_date(t: Time) -> int: # cache key, propagated positions are reused for the whole day
+    return int(np.floor(float(t.tt) + 0.5))
+
+def propagate(ra, dec, pm_ra, pm_dec, years: float):
+    """ (RA, Dec) in degrees moved by proper motion (mas/yr, pmRA already scaled by cos Dec) over years.
+    Linear motion on the tangent plane; over a few decades the error is far below an arcsecond """
+    ra_rad = np.radians(ra)
+    dec_rad = np.radians(dec)
+    pm_ra = np.nan_to_num(pm_ra) * MAS_TO_RADIANS * years # stars without proper motion stay put
+    pm_dec = np.nan_to_num(pm_dec) * MAS_TO_RADIANS * years
+
+    sin_ra, cos_ra = np.sin(ra_rad), np.cos(ra_rad)
+    sin_dec, cos_dec = np.sin(dec_rad), np.cos(dec_rad)
+    x = cos_dec * cos_ra - pm_ra * sin_ra - pm_dec * sin_dec * cos_ra
+    y = cos_dec * sin_ra + pm_ra * cos_ra - pm_dec * sin_dec * sin_ra
+    z = sin_dec + pm_dec * cos_dec
+
+    return np.degrees(np.arctan2(y, x)) % 360.0, np.degrees(np.arctan2(z, np.hypot(x, y)))
+
+def max_drift(pm_ra, pm_dec, years: float) -> float:
+    """ Largest displacement in degrees, to pad index lookups built at the catalog epoch """
+    if len(pm_ra) == 0:
+        return 0.0
+    return float(np.nanmax(np.hypot(np.nan_to_num(pm_ra), np.nan_to_num(pm_dec)))) * abs(years) / 3.6e6
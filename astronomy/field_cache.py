@@ -0,0 +1,33 @@
+""" Reuses one over-fetched field-of-view query across frames while the pointing stays near it """
+import time
+import numpy as np
+from utils import haversine_dist
+from astronomy.targets import Targets
+
+MARGIN = 0.25 # fetch a cone this fraction wider than the field
+MAX_AGE = 10 # seconds; planets and the Moon keep moving even when the telescope does not
+
+class FieldCache:
+    """ Hysteresis cache in front of a cone query. The cached superset covers any field whose center stays
+    within radius * MARGIN of where it was fetched; projection then drops whatever falls outside the field """
+
+    def __init__(self, query, margin: float = MARGIN, max_age: float = MAX_AGE):
+        self.query = query # (ra, dec, radius, mag_limit) -> Targets
+        self.margin = margin
+        self.max_age = max_age
+        self.entry = None # (ra, dec, fetched radius, radius, mag_limit, key, time, targets)
+
+    def get(self, ra: float, dec: float, radius: float, mag_limit: float, key=None) -> Targets:
+        """ key: anything else the result depends on (e.g. the catalog tier), compared by identity """
+        entry = self.entry
+        if entry is not None:
+            cached_ra, cached_dec, fetched, cached_radius, cached_mag, cached_key, fetched_at, targets = entry
+            if (cached_radius == radius and cached_mag == mag_limit and cached_key is key
+                    and time.monotonic() - fetched_at < self.max_age
+                    and np.degrees(haversine_dist(cached_ra, cached_dec, ra, dec)) + radius <= fetched):
+                return targets
+
+        fetched = radius * (1 + self.margin)
+        targets = self.query(ra, dec, fetched, mag_limit)
+        self.entry = (ra, dec, fetched, radius, mag_limit, key, time.monotonic(), targets)
+        return targets
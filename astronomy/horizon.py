@@ -0,0 +1,45 @@
+""" Fast ICRS to horizon (alt/az) transforms in plain NumPy for per-frame use.
+
+Sidereal time and the precession-nutation matrix are computed once per time step, then any number of
+positions are rotated with a single matrix product. Agrees with utils.radec_to_altaz (astropy, kept as
+the reference) to within 1 arcminute: aberration (< 21"), light deflection and polar motion are skipped,
+and like the astropy frame used there, no refraction is applied. """
+import numpy as np
+from skyfield.api import Time
+from utils import radec_to_vector
+
+class HorizonFrame:
+
+    def __init__(self, t: Time, latitude: float, longitude: float):
+        self.t = t
+        self.latitude = latitude
+        lst = np.radians((t.gast * 15.0 + longitude) % 360.0)
+        lat = np.radians(latitude)
+
+        # True equator of date -> (meridian, west-negative, pole) by rotating through local sidereal time
+        sidereal = np.array([
+            [np.cos(lst), np.sin(lst), 0.0],
+            [-np.sin(lst), np.cos(lst), 0.0],
+            [0.0, 0.0, 1.0]
+        ])
+        # -> (north, east, up)
+        horizon = np.array([
+            [-np.sin(lat), 0.0, np.cos(lat)],
+            [0.0, 1.0, 0.0],
+            [np.cos(lat), 0.0, np.sin(lat)]
+        ])
+        self.equatorial = sidereal @ t.M # t.M: ICRS -> true equator and equinox of date
+        self.matrix = horizon @ self.equatorial
+
+    def altaz(self, ra, dec):
+        """ Altitude and azimuth (degrees, azimuth east of north) for scalar or array RA/Dec in degrees """
+        north, east, up = np.tensordot(self.matrix, radec_to_vector(ra, dec), axes=1)
+        alt = np.degrees(np.arcsin(np.clip(up, -1.0, 1.0)))
+        az = np.degrees(np.arctan2(east, north)) % 360.0
+        return alt, az
+
+    def hadec(self, ra, dec):
+        """ Local hour angle (degrees, -180 to 180, positive west) and declination of date """
+        x, y, z = np.tensordot(self.equatorial, radec_to_vector(ra, dec), axes=1)
+        hour_angle = np.degrees(np.arctan2(-y, x))
+        return hour_angle, np.degrees(np.arcsin(np.clip(z, -1.0, 1.0)))
@@ -0,0 +1,49 @@
+""" Date-range excerpts of the SPK kernels, so boot only opens the years actually observed.
+
+Build them once (and again before they run out) with:
+    python -m astronomy.kernels [years]
+jplephem memory-maps SPK segments, so only the records for the dates queried are ever read from disk. """
+import os
+import sys
+import time
+from jplephem.daf import DAF
+from jplephem.spk import SPK
+from jplephem.excerpter import write_excerpt
+from skyfield.api import load
+
+EXCERPT_YEARS = 10
+EXCERPT_MARGIN = 30 # days before today, so a clock set slightly wrong still falls inside
+
+def excerpt_path(path: str) -> str:
+    root, extension = os.path.splitext(path)
+    return f"{root}_excerpt{extension}"
+
+def write_kernel_excerpt(path: str, start_jd: float, end_jd: float, output: str = None):
+    """ Copy every segment of the kernel at path, trimmed to [start_jd, end_jd] """
+    output = output or excerpt_path(path)
+    with open(path, 'rb') as f:
+        spk = SPK(DAF(f))
+        with open(output + ".tmp", 'w+b') as excerpt:
+            write_excerpt(spk, excerpt, start_jd, end_jd, spk.daf.summaries())
+    os.replace(output + ".tmp", output) # never leave a half-written kernel where the loader looks
+    return output
+
+def covers(kernel, jd: float) -> bool:
+    """ Whether every body pair of an opened kernel has a segment spanning the Julian date """
+    covered = {}
+    for segment in kernel.segments:
+        spk = segment.spk_segment
+        pair = (spk.center, spk.target)
+        covered[pair] = covered.get(pair, False) or spk.start_jd <= jd <= spk.end_jd
+    return all(covered.values())
+
+def excerpt_kernels(paths: list, years: float = EXCERPT_YEARS):
+    today = load.timescale().now().tt
+    for path in paths:
+        start = time.time()
+        output = write_kernel_excerpt(path, today - EXCERPT_MARGIN, today + years * 365.25)
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB -> {output}: {os.path.getsize(output) / 1e6:.1f} MB in {time.time() - start:.2f} seconds")
+
+if __name__ == "__main__":
+    from astronomy.catalog import ephemeris_file, asteroids_file
+    excerpt_kernels([ephemeris_file, asteroids_file], float(sys.argv[1]) if len(sys.argv) > 1 else EXCERPT_YEARS)
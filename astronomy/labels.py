@@ -0,0 +1,40 @@
+""" Label placement on a coarse occupancy grid: each placed label claims the grid cells under its text box,
+and any later label touching a claimed cell is dropped. Labels are offered brightest first """
+from functools import lru_cache
+import numpy as np
+
+CELL = 6 # pixels per grid cell side, about half the label text height
+
+@lru_cache(maxsize=2048)
+def text_box(text: str, font) -> tuple:
+    """ (left, top, right, bottom) of the text relative to its baseline anchor, measured once per name and font """
+    return font.getbbox(text, anchor='ls')
+
+class LabelGrid:
+
+    def __init__(self, size: int, cell: int = CELL):
+        self.size = size
+        self.cell = cell
+        self.occupied = np.zeros((-(-size // cell), -(-size // cell)), dtype=bool)
+
+    def cells(self, left: float, top: float, right: float, bottom: float):
+        """ Grid slices covering a pixel box, clipped to the frame; None if the box is entirely outside """
+        x0, y0 = max(int(left // self.cell), 0), max(int(top // self.cell), 0)
+        x1 = min(int(right // self.cell) + 1, self.occupied.shape[1])
+        y1 = min(int(bottom // self.cell) + 1, self.occupied.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return slice(y0, y1), slice(x0, x1)
+
+    def is_free(self, px: float, py: float) -> bool:
+        """ Cheap check of the anchor cell only, to skip resolving names that could never be placed """
+        cells = self.cells(px, py, px, py)
+        return cells is not None and not self.occupied[cells].any()
+
+    def claim(self, px: float, py: float, box: tuple) -> bool:
+        """ Claim the cells under box (relative to the anchor at px, py) if none are taken yet """
+        cells = self.cells(px + box[0], py + box[1], px + box[2], py + box[3])
+        if cells is None or self.occupied[cells].any():
+            return False
+        self.occupied[cells] = True
+        return True
@@ -0,0 +1,173 @@
+""" Minor planets from an MPCORB-style orbital elements file, propagated all at once with vectorized Kepler solves.
+
+Parse MPCORB.DAT once (and again after downloading a newer one) with:
+    python -m astronomy.minor_bodies
+Boot only reads the resulting .npy. """
+import os
+import time
+import numpy as np
+from astronomy.columnar import write_columns
+
+AU_KM = 149597870.7
+LIGHT_SPEED = 173.1446326846693 # AU/day
+OBLIQUITY = np.radians(23.4392911) # J2000 ecliptic -> ICRS equator
+MAX_H = 11.0 # absolute magnitude cut, keeps a few thousand of the brightest objects
+KEPLER_TOLERANCE = 1e-12
+KEPLER_ITERATIONS = 30
+
+ELEMENTS_DTYPE = np.dtype([
+    ('H', np.float32),
+    ('G', np.float32),
+    ('epoch', np.float64), # TT Julian date
+    ('M', np.float64), # mean anomaly at epoch, degrees
+    ('peri', np.float64), # argument of perihelion, J2000 ecliptic
+    ('node', np.float64),
+    ('incl', np.float64),
+    ('e', np.float64),
+    ('n', np.float64), # mean motion, degrees/day
+    ('a', np.float64), # AU
+    ('name', 'U32')
+])
+
+def julian_date(year, month, day) -> float: # 0h TT, Gregorian calendar
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    return day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045 - 0.5
+
+def unpack_epoch(packed: str) -> float:
+    """ MPC packed date, e.g. K2555 -> 2025 May 5 """
+    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUV"
+    year = (ord(packed[0]) - ord('A') + 10) * 100 + int(packed[1:3])
+    return julian_date(year, digits.index(packed[3]), digits.index(packed[4]))
+
+def read_mpcorb(path: str, max_h: float = MAX_H) -> np.ndarray:
+    """ Parse the fixed-width MPCORB format; objects fainter than max_h or without H are skipped """
+    rows = []
+    epochs = {} # nearly every object shares the same epoch
+    with open(path, 'r', encoding='latin-1') as f:
+        for i, line in enumerate(f):
+            if i < 100 and line.startswith('-----'):
+                rows.clear() # end of the header, if any; drop anything in it that happened to parse
+                continue
+            if len(line) < 103 or not line[8:13].strip():
+                continue
+            try:
+                h = float(line[8:13])
+                if h > max_h:
+                    continue
+                packed = line[20:25]
+                if packed not in epochs:
+                    epochs[packed] = unpack_epoch(packed)
+                name = line[166:194].strip()
+                if name.startswith('('):
+                    name = name.split(')', 1)[1].strip() # "(1) Ceres" -> "Ceres"
+                rows.append((h, float(line[14:19].strip() or 0.15), epochs[packed], float(line[26:35]), float(line[37:46]),
+                             float(line[48:57]), float(line[59:68]), float(line[70:79]), float(line[80:91]), float(line[92:103]),
+                             name or line[0:7].strip()))
+            except ValueError:
+                continue # malformed line
+    return np.array(rows, dtype=ELEMENTS_DTYPE)
+
+def elements_path(path: str, max_h: float = MAX_H) -> str: # parsed elements, next to the source file
+    return os.path.join(os.path.splitext(path)[0], f"elements_h{max_h:g}.npy")
+
+def convert_elements(path: str, max_h: float = MAX_H):
+    print(f"Converting {path} to {elements_path(path, max_h)}...", end=' ')
+    start = time.time()
+    cache = elements_path(path, max_h)
+    elements = read_mpcorb(path, max_h)
+    write_columns(os.path.dirname(cache), {os.path.splitext(os.path.basename(cache))[0]: elements})
+    print(f"{len(elements)} bodies in {time.time() - start:.2f} seconds")
+
+def load_elements(path: str, max_h: float = MAX_H) -> np.ndarray:
+    """ Elements parsed by convert_elements(); the source file itself is never read at boot """
+    cache = elements_path(path, max_h)
+    if os.path.exists(path) and os.path.getmtime(cache) < os.path.getmtime(path):
+        print(f"{cache} is older than {path}, re-run python -m astronomy.minor_bodies")
+    return np.load(cache)
+
+def solve_kepler(mean_anomaly: np.ndarray, e: np.ndarray) -> np.ndarray:
+    """ Eccentric anomaly for every object and time at once, by Newton's method """
+    eccentric = np.where(e < 0.8, mean_anomaly, np.pi * np.sign(np.sin(mean_anomaly)))
+    for _ in range(KEPLER_ITERATIONS):
+        step = (eccentric - e * np.sin(eccentric) - mean_anomaly) / (1 - e * np.cos(eccentric))
+        eccentric = eccentric - step
+        if np.max(np.abs(step), initial=0.0) < KEPLER_TOLERANCE:
+            break
+    return eccentric
+
+class MinorBodies:
+
+    def __init__(self, elements: np.ndarray):
+        elements = elements[(elements['e'] < 1.0) & (elements['a'] > 0)] # bound orbits only
+        self.elements = elements
+        self.names = [str(name) for name in elements['name']]
+        self.h = elements['H'].astype(np.float64)
+        self.g = elements['G'].astype(np.float64)
+        self.epoch = elements['epoch']
+        self.mean_anomaly = np.radians(elements['M'])
+        self.mean_motion = np.radians(elements['n'])
+        self.e = elements['e']
+        self.a = elements['a']
+
+        # Orbital plane axes (perihelion direction P, and Q 90 degrees ahead) in the ICRS frame, fixed per object
+        peri, node, incl = np.radians(elements['peri']), np.radians(elements['node']), np.radians(elements['incl'])
+        p = np.array([
+            np.cos(peri) * np.cos(node) - np.sin(peri) * np.sin(node) * np.cos(incl),
+            np.cos(peri) * np.sin(node) + np.sin(peri) * np.cos(node) * np.cos(incl),
+            np.sin(peri) * np.sin(incl)
+        ])
+        q = np.array([
+            -np.sin(peri) * np.cos(node) - np.cos(peri) * np.sin(node) * np.cos(incl),
+            -np.sin(peri) * np.sin(node) + np.cos(peri) * np.cos(node) * np.cos(incl),
+            np.cos(peri) * np.sin(incl)
+        ])
+        to_equator = np.array([
+            [1.0, 0.0, 0.0],
+            [0.0, np.cos(OBLIQUITY), -np.sin(OBLIQUITY)],
+            [0.0, np.sin(OBLIQUITY), np.cos(OBLIQUITY)]
+        ])
+        self.p = to_equator @ p
+        self.q = to_equator @ q
+
+    def __len__(self):
+        return len(self.names)
+
+    def select(self, mask: np.ndarray):
+        return MinorBodies(self.elements[mask])
+
+    def heliocentric(self, jd, per_object: bool = False) -> np.ndarray:
+        """ (3, N, ...) heliocentric ICRS positions in AU for times jd (...), or (N, ...) with per_object """
+        column = (slice(None),) + (None,) * (np.ndim(jd) - (1 if per_object else 0))
+        mean_anomaly = self.mean_anomaly[column] + self.mean_motion[column] * (jd - self.epoch[column])
+        e = self.e[column]
+        eccentric = solve_kepler(np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi, e)
+        x = self.a[column] * (np.cos(eccentric) - e)
+        y = self.a[column] * np.sqrt(1 - e * e) * np.sin(eccentric)
+        return self.p[(slice(None),) + column] * x + self.q[(slice(None),) + column] * y
+
+    def observe(self, jd, sun_km: np.ndarray, observer_km: np.ndarray):
+        """ Astrometric (3, N[, T]) positions in km seen from the observer, with light-time, and V magnitudes.
+        sun_km and observer_km are barycentric (3[, T]) positions at jd """
+        offset = ((sun_km - observer_km) / AU_KM)[:, np.newaxis] # observer -> Sun, per time
+        helio = self.heliocentric(jd)
+        distance = np.linalg.norm(helio + offset, axis=0)
+        helio = self.heliocentric(jd - distance / LIGHT_SPEED, per_object=True) # one light-time iteration is plenty at these speeds
+        geocentric = helio + offset
+        magnitudes = self.magnitudes(np.linalg.norm(helio, axis=0), np.linalg.norm(geocentric, axis=0), np.sum(helio * geocentric, axis=0))
+        return geocentric * AU_KM, magnitudes
+
+    def magnitudes(self, r: np.ndarray, delta: np.ndarray, dot: np.ndarray) -> np.ndarray:
+        """ V from the H, G system; r and delta in AU, dot is helio . geocentric, giving the phase angle """
+        phase = np.arccos(np.clip(dot / (r * delta), -1.0, 1.0))
+        tan_half = np.tan(phase / 2)
+        extra = (slice(None),) + (None,) * (np.ndim(r) - 1)
+        g = self.g[extra]
+        phi1 = np.exp(-3.33 * tan_half ** 0.63)
+        phi2 = np.exp(-1.87 * tan_half ** 1.22)
+        return self.h[extra] + 5 * np.log10(r * delta) - 2.5 * np.log10((1 - g) * phi1 + g * phi2)
+
+if __name__ == "__main__":
+    from astronomy.catalog import minor_bodies_file
+    convert_elements(minor_bodies_file)
@@ -0,0 +1,62 @@
+""" Normalized name lookups (exact, prefix and fuzzy) over catalog rows, built once at load """
+import bisect
+import difflib
+import numpy as np
+
+def named_rows(names: np.ndarray) -> np.ndarray:
+    # most rows are unnamed, find the rest without a Python loop
+    return np.nonzero(np.char.str_len(np.char.strip(np.ma.filled(names, ''))) > 0)[0]
+
+class NameIndex:
+
+    def __init__(self, names: np.ndarray, normalize, named: np.ndarray = None):
+        self.normalize = normalize
+        self.rows = {} # normalized name -> catalog row indices
+
+        if named is None:
+            named = named_rows(names)
+        for i in named:
+            name = names[i]
+            if isinstance(name, bytes):
+                name = name.decode('utf-8')
+            key = normalize(str(name))
+            if key:
+                self.rows.setdefault(key, []).append(int(i))
+        self.keys = sorted(self.rows)
+
+    def _key(self, name: str) -> str:
+        if name is None or len(str(name).strip()) == 0:
+            return ''
+        return self.normalize(str(name))
+
+    def exact(self, name: str) -> list:
+        return list(self.rows.get(self._key(name), []))
+
+    def prefix(self, name: str, limit: int = None) -> list:
+        key = self._key(name)
+        if not key:
+            return []
+        results = []
+        i = bisect.bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i].startswith(key):
+            results.extend(self.rows[self.keys[i]])
+            if limit is not None and len(results) >= limit:
+                return results[:limit]
+            i += 1
+        return results
+
+    def fuzzy(self, name: str, limit: int = 5, cutoff: float = 0.7) -> list:
+        key = self._key(name)
+        if not key:
+            return []
+        results = []
+        for match in difflib.get_close_matches(key, self.keys, n=limit, cutoff=cutoff):
+            results.extend(self.rows[match])
+        return results[:limit]
+
+    def search(self, name: str, mode: str = "exact", limit: int = None) -> list:
+        match mode:
+            case "exact": return self.exact(name)
+            case "prefix": return self.prefix(name, limit)
+            case "fuzzy": return self.fuzzy(name, limit or 5)
+        raise ValueError(f"Unknown name search mode: {mode}")
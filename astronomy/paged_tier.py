@@ -0,0 +1,135 @@
+""" Faint-star tier kept on disk in sky-region pages, loaded on demand with LRU eviction """
+import os
+import queue
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils import radec_to_vector, radec_to_unit_vectors
+from astronomy.sky_grid import SkyGrid
+from astronomy.columnar import write_columns
+from astronomy.epoch import propagate
+
+PAGE_SIZE = 10.0 # degrees, one page per coarse SkyGrid cell (~400 pages over the sky)
+PAGE_CACHE_SIZE = 48 # pages held in memory
+PREFETCH_MARGIN = PAGE_SIZE # also load pages this far beyond the current field
+
+PAGE_DTYPE = np.dtype([
+    ('RAdeg', np.float64),
+    ('DEdeg', np.float64),
+    ('Vmag', np.float32),
+    ('pmRA', np.float32), # mas/yr, NaN when unknown
+    ('pmDE', np.float32),
+    ('row', np.int64) # row in the full catalog, for names
+])
+
+def write_pages(directory: str, ra: np.ndarray, dec: np.ndarray, vmag: np.ndarray, first_row: int, page_size: float = PAGE_SIZE,
+                pm_ra: np.ndarray = None, pm_dec: np.ndarray = None, epoch: float = 2000.0):
+    """ Split rows from first_row on into one file per sky region. Rows must be magnitude-sorted,
+    each page keeps that order so a magnitude limit is a prefix of the page """
+    if pm_ra is None or pm_dec is None:
+        pm_ra = pm_dec = np.full(len(ra), np.nan)
+    grid = SkyGrid(ra[first_row:], dec[first_row:], page_size)
+    pages = {}
+    for cell in range(grid.n_cells):
+        rows = grid.order[grid.cell_start[cell]:grid.cell_start[cell + 1]]
+        if len(rows) == 0:
+            continue
+        page = np.empty(len(rows), dtype=PAGE_DTYPE)
+        page['RAdeg'] = ra[first_row:][rows]
+        page['DEdeg'] = dec[first_row:][rows]
+        page['Vmag'] = vmag[first_row:][rows]
+        page['pmRA'] = pm_ra[first_row:][rows]
+        page['pmDE'] = pm_dec[first_row:][rows]
+        page['row'] = rows + first_row
+        pages[f"page_{cell}"] = page
+    directory = os.path.join(directory, 'pages')
+    write_columns(directory, pages)
+    fastest = np.nanmax(np.hypot(pm_ra[first_row:], pm_dec[first_row:]), initial=0.0)
+    layout = np.array([first_row, page_size, epoch, np.nan_to_num(fastest)])
+    write_columns(directory, {'layout': layout}) # last, so a complete layout means complete pages
+
+class PagedTier:
+    """ Rows past first_row of a magnitude-sorted catalog, read from disk a region at a time """
+
+    def __init__(self, directory: str, cache_size: int = PAGE_CACHE_SIZE):
+        self.directory = os.path.join(directory, 'pages')
+        layout = np.load(os.path.join(self.directory, 'layout.npy'))
+        self.first_row = int(layout[0])
+        self.grid = SkyGrid.cells(float(layout[1]))
+        self.epoch = float(layout[2])
+        self.fastest = float(layout[3]) # largest proper motion in the pages, mas/yr
+        self.years = 0.0 # proper motion applied to pages as they are read
+        self.drift = 0.0 # degrees to pad region lookups by
+        self.date = None
+        self.cache_size = cache_size
+        self.pages = OrderedDict() # cell -> (page, vectors), least recently used first
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.queued = set()
+        threading.Thread(target=self.run_prefetch, daemon=True).start()
+
+    def read_page(self, cell: int):
+        path = os.path.join(self.directory, f"page_{cell}.npy")
+        page = np.load(path) if os.path.exists(path) else np.empty(0, dtype=PAGE_DTYPE) # empty regions have no file
+        if self.years != 0.0 and self.fastest > 0.0:
+            page['RAdeg'], page['DEdeg'] = propagate(page['RAdeg'], page['DEdeg'], page['pmRA'], page['pmDE'], self.years)
+        return page, radec_to_unit_vectors(page['RAdeg'], page['DEdeg'])
+
+    def page(self, cell: int):
+        with self.lock:
+            if cell in self.pages:
+                self.pages.move_to_end(cell)
+                return self.pages[cell]
+        entry = self.read_page(cell)
+        with self.lock:
+            self.pages[cell] = entry
+            self.pages.move_to_end(cell)
+            while len(self.pages) > self.cache_size:
+                self.pages.popitem(last=False)
+        return entry
+
+    def propagate(self, year: float, date: int):
+        """ Pages read from now on are moved to year; cached pages from another date are dropped """
+        if date == self.date:
+            return
+        with self.lock:
+            self.years = year - self.epoch
+            self.drift = self.fastest * abs(self.years) / 3.6e6
+            self.date = date
+            self.pages.clear()
+
+    def cells(self, ra: float, dec: float, radius: float) -> list:
+        return [cell for lo, hi in self.grid.cell_ranges(ra, dec, radius) for cell in range(lo, hi + 1)]
+
+    def query(self, ra: float, dec: float, radius: float, mag_limit: float = None):
+        """ (rows, RA, Dec, Vmag) of paged stars within radius degrees """
+        center = radec_to_vector(ra, dec).astype(np.float32)
+        min_dot = np.float32(np.cos(np.radians(radius)))
+        parts = []
+        cells = self.cells(ra, dec, radius + self.drift)
+        for cell in cells:
+            page, vectors = self.page(cell)
+            count = len(page) if mag_limit is None else np.searchsorted(page['Vmag'], mag_limit, side='right')
+            parts.append(page[:count][vectors[:count] @ center >= min_dot])
+        self.prefetch(ra, dec, radius + PREFETCH_MARGIN, self.cache_size - len(cells))
+
+        found = np.concatenate(parts) if parts else np.empty(0, dtype=PAGE_DTYPE)
+        return found['row'], found['RAdeg'], found['DEdeg'], found['Vmag']
+
+    def prefetch(self, ra: float, dec: float, radius: float, limit: int):
+        with self.lock:
+            missing = [cell for cell in self.cells(ra, dec, radius) if cell not in self.pages and cell not in self.queued]
+            missing = missing[:max(0, limit)] # never evict pages the current field still needs
+            self.queued.update(missing)
+        for cell in missing:
+            self.requests.put(cell)
+
+    def run_prefetch(self):
+        while True:
+            cell = self.requests.get()
+            try:
+                self.page(cell)
+            except Exception as e:
+                print(f"Error loading catalog page {cell}: {e}")
+            with self.lock:
+                self.queued.discard(cell)
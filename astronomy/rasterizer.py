@@ -0,0 +1,89 @@
+""" Draws the starfield straight into a 240x240 buffer from projected coordinates: markers are blitted
+from a sprite atlas into a NumPy buffer, then text and the Sun are drawn over it with PIL """
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+import matplotlib.font_manager as fm
+from astronomy.sprites import SpriteAtlas, blit
+from astronomy.labels import LabelGrid, text_box
+
+SIZE = 240
+SCALE = SIZE / 2 # pixels per unit of normalized view coordinates, the FOV circle touches the edges
+POINT = 0.93 # pixels per matplotlib point, so marker sizes keep their old look
+
+COLOR_BACKGROUND = (0, 0, 0, 255)
+COLOR_FOV = (255, 0, 0, 255)
+COLOR_STAR = (255, 255, 255, 255)
+COLOR_STAR_LABEL = (255, 165, 0, 255) # orange
+COLOR_PLANET = (0, 255, 255, 255) # cyan
+COLOR_SUN = (255, 255, 0, 255)
+COLOR_PLANET_LABEL = (255, 0, 0, 255)
+
+label_font = ImageFont.truetype(fm.findfont(fm.FontProperties(weight='bold')), 14)
+planet_font = ImageFont.truetype(fm.findfont(fm.FontProperties(weight='bold')), 11)
+compass_font = ImageFont.truetype(fm.findfont(fm.FontProperties()), 11)
+
+def _background() -> Image.Image:
+    image = Image.new("RGBA", (SIZE, SIZE), COLOR_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((0, 0, SIZE - 1, SIZE - 1), outline=COLOR_FOV, width=1)
+    middle = SIZE / 2
+    draw.text((1, middle), 'E', font=compass_font, fill=COLOR_STAR, anchor='lm')
+    draw.text((SIZE - 1, middle), 'W', font=compass_font, fill=COLOR_STAR, anchor='rm')
+    return image
+
+background = np.asarray(_background().convert("RGB")) # copied for every frame
+offsets = np.arange(SIZE) + 0.5 - SIZE / 2
+fov_mask = (offsets[np.newaxis, :] ** 2 + offsets[:, np.newaxis] ** 2 <= (SIZE / 2) ** 2)[..., np.newaxis]
+atlas = SpriteAtlas(COLOR_STAR, COLOR_PLANET, COLOR_STAR)
+
+class Frame:
+    """ One starfield frame being drawn """
+
+    def __init__(self, size: int = SIZE, pixels: np.ndarray = None):
+        """ size: a larger square for sky tiles, drawn at the same scale around the same center """
+        self.size = size
+        self.pixels = background.copy() if pixels is None else pixels
+        self.suns = []
+        self.labels = []
+        self.label_grid = LabelGrid(size)
+
+    @classmethod
+    def from_tile(cls, pixels: np.ndarray):
+        """ Frame over a view cut from a sky tile: clipped to the field circle, with the field ring and compass """
+        view = pixels * fov_mask
+        return cls(pixels=np.maximum(view, background, out=view))
+
+    def point(self, x: float, y: float): # normalized view coordinates (-1 to 1, y up) to pixels (y down)
+        return self.size / 2 + float(x) * SCALE, self.size / 2 - float(y) * SCALE
+
+    def star(self, x: float, y: float, size: float): # size in points, as the old matplotlib markers
+        blit(self.pixels, atlas.star(size * POINT), *self.point(x, y))
+
+    def planet(self, x: float, y: float, size: float, is_sun: bool = False):
+        if is_sun:
+            self.suns.append((*self.point(x, y), float(size) * POINT / 2))
+            return
+        blit(self.pixels, atlas.planet(size * POINT), *self.point(x, y))
+
+    def label_free(self, x: float, y: float) -> bool:
+        return self.label_grid.is_free(*self.point(x, y))
+
+    def label(self, x: float, y: float, text: str, planet: bool = False) -> bool:
+        """ Queue a label unless it would overlap one already placed; returns whether it was placed """
+        px, py = self.point(x, y)
+        if not self.label_grid.claim(px, py, text_box(text, planet_font if planet else label_font)):
+            return False
+        self.labels.append((px, py, text, planet))
+        return True
+
+    def finish(self) -> Image.Image:
+        image = Image.fromarray(self.pixels, "RGB").convert("RGBA")
+        draw = ImageDraw.Draw(image)
+        for px, py, size in self.suns:
+            radius = np.where(np.arange(10) % 2 == 0, 1.0, 0.38) * size # five-pointed star marker
+            angle = np.radians(90 + np.arange(10) * 36)
+            draw.polygon(list(zip(px + radius * np.cos(angle), py - radius * np.sin(angle))), fill=COLOR_SUN, outline=COLOR_STAR, width=2)
+        for px, py, text, planet in self.labels: # text always on top of markers
+            font = planet_font if planet else label_font
+            draw.text((px, py), text, font=font, fill=COLOR_PLANET_LABEL if planet else COLOR_STAR_LABEL, anchor='ls') # baseline at the anchor, like matplotlib
+        return image
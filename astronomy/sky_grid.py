@@ -0,0 +1,97 @@
+""" Declination-band / RA-bucket spatial index for fast cone searches over the catalog """
+import numpy as np
+
+class SkyGrid:
+    """ Buckets catalog rows into roughly equal-area cells, built once at load time """
+
+    def __init__(self, ra, dec, cell_size: float = 1.0):
+        self._layout(cell_size)
+
+        ra = np.ma.filled(np.ma.asarray(ra, dtype=np.float64), np.nan)
+        dec = np.ma.filled(np.ma.asarray(dec, dtype=np.float64), np.nan)
+        cells = self.cell_of(ra, dec)
+
+        # Rows sorted by cell; a cell (or run of neighbouring cells in a band) is one contiguous slice
+        self.order = np.argsort(cells, kind='stable')
+        self.cell_start = np.searchsorted(cells[self.order], np.arange(self.n_cells + 1))
+
+    @classmethod
+    def from_index(cls, order: np.ndarray, cell_start: np.ndarray, cell_size: float = 1.0):
+        """ Reopen a grid from arrays saved with the columnar catalog, without touching RA/Dec """
+        grid = cls.__new__(cls)
+        grid._layout(cell_size)
+        if len(cell_start) != grid.n_cells + 1:
+            raise ValueError("Saved grid index does not match the cell size")
+        grid.order = order
+        grid.cell_start = cell_start
+        return grid
+
+    @classmethod
+    def cells(cls, cell_size: float = 1.0):
+        """ Cell layout only, for mapping coordinates to cell ids without any rows """
+        grid = cls.__new__(cls)
+        grid._layout(cell_size)
+        return grid
+
+    def _layout(self, cell_size: float):
+        self.cell_size = cell_size
+        self.n_bands = int(np.ceil(180.0 / cell_size))
+
+        # Each declination band is split into as many RA cells as fit at its widest (equator-most) edge
+        band_lo = -90.0 + np.arange(self.n_bands) * cell_size
+        band_hi = np.minimum(band_lo + cell_size, 90.0)
+        widest = np.where((band_lo <= 0) & (band_hi >= 0), 0.0, np.minimum(np.abs(band_lo), np.abs(band_hi)))
+        self.band_cells = np.maximum(1, np.ceil(360.0 * np.cos(np.radians(widest)) / cell_size)).astype(np.int64)
+        self.band_offset = np.concatenate(([0], np.cumsum(self.band_cells)))
+        self.n_cells = int(self.band_offset[-1])
+
+    def cell_of(self, ra, dec):
+        valid = np.isfinite(ra) & np.isfinite(dec)
+        ra = np.where(valid, ra, 0.0) % 360.0
+        dec = np.clip(np.where(valid, dec, 0.0), -90.0, 90.0)
+
+        band = np.minimum(((dec + 90.0) / self.cell_size).astype(np.int64), self.n_bands - 1)
+        column = np.minimum((ra / 360.0 * self.band_cells[band]).astype(np.int64), self.band_cells[band] - 1)
+        return np.where(valid, self.band_offset[band] + column, self.n_cells) # invalid rows land past the last cell
+
+    def cell_ranges(self, ra: float, dec: float, radius: float):
+        """ (first, last) cell id pairs, inclusive, covering a cone """
+        first_band = max(0, int((dec - radius + 90.0) / self.cell_size))
+        last_band = min(self.n_bands - 1, int((dec + radius + 90.0) / self.cell_size))
+
+        if abs(dec) + radius >= 90.0: # cone reaches a pole, every RA is possible
+            half_width = 180.0
+        else:
+            half_width = np.degrees(np.arcsin(min(1.0, np.sin(np.radians(radius)) / np.cos(np.radians(dec)))))
+
+        ranges = []
+        for band in range(first_band, last_band + 1):
+            n = int(self.band_cells[band])
+            offset = int(self.band_offset[band])
+            if half_width >= 180.0 or 2 * half_width * n / 360.0 + 2 >= n:
+                ranges.append((offset, offset + n - 1))
+                continue
+
+            lo = int(np.floor((ra - half_width) % 360.0 / 360.0 * n))
+            hi = int(np.floor((ra + half_width) % 360.0 / 360.0 * n))
+            if lo <= hi:
+                ranges.append((offset + lo, offset + hi))
+            else: # wraps through RA 0
+                ranges.append((offset + lo, offset + n - 1))
+                ranges.append((offset, offset + hi))
+        return ranges
+
+    def query(self, ra: float, dec: float, radius: float, row_limit: int = None) -> np.ndarray:
+        """ Row indices of every object in the cells touched by a cone, a superset of the cone itself.
+        With row_limit, only rows below it are returned; rows within a cell are ascending, so each cell stops early """
+        slices = []
+        for lo, hi in self.cell_ranges(ra, dec, radius):
+            if row_limit is None:
+                slices.append(self.order[self.cell_start[lo]:self.cell_start[hi + 1]])
+                continue
+            for cell in range(lo, hi + 1):
+                cell_rows = self.order[self.cell_start[cell]:self.cell_start[cell + 1]]
+                slices.append(cell_rows[:np.searchsorted(cell_rows, row_limit)])
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
@@ -0,0 +1,96 @@
+""" Pre-rendered sky tiles for the navigation view. A tile is a tangent-plane render somewhat larger than the
+field, centered where the telescope pointed when it was drawn. Display frames are cut out of it with one affine
+resample (pointing drift and roll), while a background thread re-renders it before the pointing leaves it """
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from utils import haversine_dist
+
+TILE_SCALE = 1.5 # tile half-width in field radii
+SAFE_ZONE = 0.5 # of the spare margin; past this offset a fresh tile is rendered in the background
+TILE_LEVELS = 4 # zoom levels kept, so stepping the zoom back and forth needs no render
+MAX_AGE = 10 # seconds, planets keep moving even when the telescope does not
+
+class SkyTile:
+    """ One rendered tile: the image at roll 0, and the objects it may need to label """
+
+    def __init__(self, image, ra: float, dec: float, radius: float, key, labels):
+        self.image = image
+        self.ra = ra
+        self.dec = dec
+        self.radius = radius # field radius it was drawn for, in degrees
+        self.key = key
+        self.labels = labels # Targets: planets and bright stars on the tile, labelled per frame so text stays upright
+        self.rendered_at = time.monotonic()
+
+    def offset(self, ra: float, dec: float) -> float: # degrees from the tile center
+        return float(np.degrees(haversine_dist(self.ra, self.dec, ra, dec)))
+
+    def covers(self, ra: float, dec: float, radius: float, scale: float = TILE_SCALE) -> bool:
+        """ Whether the whole field circle at (ra, dec) lies inside the tile, at any roll. The field edge is
+        atan(radius) from its center, and the tile reaches tan^-1(scale * radius) from its own """
+        if radius != self.radius:
+            return False
+        farthest = np.radians(self.offset(ra, dec)) + np.arctan(np.radians(radius))
+        return farthest < np.pi / 2 and np.tan(farthest) <= scale * np.radians(radius)
+
+    def is_fresh(self, ra: float, dec: float, scale: float = TILE_SCALE) -> bool:
+        return time.monotonic() - self.rendered_at < MAX_AGE and self.offset(ra, dec) <= SAFE_ZONE * (scale - 1) * self.radius
+
+class TileCache:
+    """ Tiles per zoom level. A missing or outgrown tile, or one drawn from a replaced catalog tier or another
+    magnitude limit, is rendered on the spot; one that is merely drifting toward its edge or getting old keeps
+    being used while its replacement renders off the display thread """
+
+    def __init__(self, render, scale: float = TILE_SCALE, levels: int = TILE_LEVELS):
+        self.render = render # (ra, dec, radius, zoom) -> SkyTile
+        self.scale = scale
+        self.levels = levels
+        self.tiles = OrderedDict() # zoom -> SkyTile, least recently rendered first
+        self.lock = threading.Lock() # one render at a time
+        self.pending = None # (ra, dec, radius, zoom) for the background thread
+        self.wake = threading.Event()
+        self.thread = None
+
+    def get(self, ra: float, dec: float, radius: float, zoom: float, key=None) -> SkyTile:
+        """ key: anything else the tile depends on (e.g. the catalog tier and magnitude limit) """
+        tile = self.tiles.get(zoom)
+        if tile is None or tile.key != key or not tile.covers(ra, dec, radius, self.scale):
+            tile = self.render_now(ra, dec, radius, zoom)
+        elif not tile.is_fresh(ra, dec, self.scale):
+            self.request(ra, dec, radius, zoom)
+        return tile
+
+    def render_now(self, ra: float, dec: float, radius: float, zoom: float) -> SkyTile:
+        with self.lock:
+            tile = self.render(ra, dec, radius, zoom)
+            self.store(zoom, tile)
+        return tile
+
+    def store(self, zoom: float, tile: SkyTile):
+        self.tiles[zoom] = tile
+        self.tiles.move_to_end(zoom)
+        while len(self.tiles) > self.levels:
+            self.tiles.popitem(last=False)
+
+    def request(self, ra: float, dec: float, radius: float, zoom: float):
+        if self.lock.locked():
+            return # a render is already under way, the next frame checks its result
+        self.pending = (ra, dec, radius, zoom)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.wake.set()
+
+    def run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            pending, self.pending = self.pending, None
+            if pending is None:
+                continue
+            try:
+                self.render_now(*pending)
+            except Exception as e:
+                print(f"Error rendering sky tile: {e}")
@@ -0,0 +1,58 @@
+""" Pre-rendered, anti-aliased star and planet markers, blitted into the frame instead of rasterized per object """
+import numpy as np
+
+SUBSAMPLES = 4 # per pixel side, for coverage-based anti-aliasing
+STAR_STEP = 0.25 # pixels between star sprite diameters
+STAR_MAX = 16.0
+PLANET_STEP = 1.0
+PLANET_MAX = 48.0
+OUTLINE = 1.9 # planet outline width in pixels
+
+def coverage(size: int, radius: float) -> np.ndarray:
+    """ (size, size) fraction of each pixel inside a circle centered on the sprite """
+    offsets = (np.arange(size * SUBSAMPLES) + 0.5) / SUBSAMPLES - size / 2
+    inside = (offsets[np.newaxis, :] ** 2 + offsets[:, np.newaxis] ** 2) <= radius ** 2
+    return inside.reshape(size, SUBSAMPLES, size, SUBSAMPLES).mean(axis=(1, 3))
+
+def disc_sprite(diameter: float, color, outline=None, outline_width: float = 0.0) -> np.ndarray:
+    """ (h, w, 3) uint8 color, already weighted by coverage """
+    outer = diameter / 2 + outline_width / 2
+    size = int(np.ceil(2 * outer)) + 2
+    alpha = coverage(size, outer)
+    fill = coverage(size, max(diameter / 2 - outline_width / 2, 0.0)) if outline is not None else alpha
+    sprite = fill[..., np.newaxis] * np.array(color[:3], dtype=np.float64)
+    if outline is not None:
+        sprite += (alpha - fill)[..., np.newaxis] * np.array(outline[:3], dtype=np.float64)
+    return np.round(sprite).astype(np.uint8)
+
+class SpriteAtlas:
+    """ Star discs for every diameter bucket (magnitude and zoom both only change the diameter), built once;
+    planet markers are built on first use and kept """
+
+    def __init__(self, star_color, planet_color, outline_color):
+        self.planet_color = planet_color
+        self.outline_color = outline_color
+        self.stars = [disc_sprite(max(i * STAR_STEP, 0.5), star_color) for i in range(int(STAR_MAX / STAR_STEP) + 1)]
+        self.planets = {}
+
+    def star(self, diameter: float) -> np.ndarray:
+        return self.stars[min(max(int(round(diameter / STAR_STEP)), 0), len(self.stars) - 1)]
+
+    def planet(self, diameter: float) -> np.ndarray:
+        key = int(round(min(diameter, PLANET_MAX) / PLANET_STEP))
+        if key not in self.planets:
+            self.planets[key] = disc_sprite(key * PLANET_STEP, self.planet_color, self.outline_color, OUTLINE)
+        return self.planets[key]
+
+def blit(pixels: np.ndarray, sprite: np.ndarray, px: float, py: float):
+    """ Lighten-blend a sprite centered at (px, py) into a uint8 (H, W, 3) buffer, clipped to its edges.
+    Markers are light on a dark sky, so taking the brighter value per channel is all the compositing needed """
+    h, w = sprite.shape[:2]
+    top = int(round(py - h / 2))
+    left = int(round(px - w / 2))
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + h, pixels.shape[0]), min(left + w, pixels.shape[1])
+    if y0 >= y1 or x0 >= x1:
+        return
+    region = pixels[y0:y1, x0:x1]
+    np.maximum(region, sprite[y0 - top:y1 - top, x0 - left:x1 - left], out=region)
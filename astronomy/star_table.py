@@ -0,0 +1,101 @@
+""" One loaded star catalog (BSC5 or Tycho) with its spatial and name indexes """
+import numpy as np
+from utils import radec_to_vector, radec_to_unit_vectors
+from astronomy.sky_grid import SkyGrid
+from astronomy.name_index import NameIndex
+from astronomy.epoch import propagate, max_drift
+
+class StarTable:
+    """ Magnitude-sorted rows plus the indexes derived from them, queried as a unit so the
+    catalog can swap one table for another without readers mixing the two """
+
+    def __init__(self, stars, indexes: dict, normalize, mag_limit: float = np.inf, pages=None, epoch: float = 2000.0):
+        self.stars = stars
+        self.mag_limit = mag_limit # faintest magnitude the table is complete to
+        self.pages = pages # optional PagedTier serving rows from pages.first_row on
+        self.epoch = epoch # Julian year of the catalog positions
+        self.grid = SkyGrid.from_index(indexes['grid_order'], indexes['grid_start'])
+        self.names = NameIndex(stars['Name'], normalize, indexes['named_rows'])
+        self.vmag = np.ma.filled(stars['Vmag'], np.nan)
+        self.named_rows = indexes['named_rows']
+        self.dso_rows = indexes['dso_rows']
+
+        # Positions as of self.date, swapped as one tuple: (RA, Dec, unit vectors, grid padding in degrees)
+        self.positions = (np.ma.filled(stars['RAdeg'], np.nan), np.ma.filled(stars['DEdeg'], np.nan), indexes['vectors'], 0.0)
+        self.date = None
+        self.has_proper_motion = 'pmRA' in stars.colnames and 'pmDE' in stars.colnames
+
+    @property
+    def ra(self):
+        return self.positions[0]
+
+    @property
+    def dec(self):
+        return self.positions[1]
+
+    def propagate(self, year: float, date: int):
+        """ Apply proper motion for the observing date, once per date for the whole table """
+        if self.pages is not None:
+            self.pages.propagate(year, date)
+        if not self.has_proper_motion or date == self.date:
+            return
+        count = len(self.stars) if self.pages is None else self.pages.first_row # paged rows are moved per page
+        pm_ra = np.ma.filled(self.stars['pmRA'][:count], np.nan)
+        pm_dec = np.ma.filled(self.stars['pmDE'][:count], np.nan)
+        ra, dec = propagate(self.stars['RAdeg'][:count], self.stars['DEdeg'][:count], pm_ra, pm_dec, year - self.epoch)
+        self.positions = (ra, dec, radec_to_unit_vectors(ra, dec), max_drift(pm_ra, pm_dec, year - self.epoch))
+        self.date = date
+
+    def rows(self, rows):
+        """ Catalog rows with RAdeg/DEdeg at the propagated positions; paged rows keep the catalog epoch """
+        rows = np.asarray(rows)
+        selected = self.stars[rows]
+        if self.date is None:
+            return selected
+        resident = rows < len(self.ra)
+        for name, values in (('RAdeg', self.ra), ('DEdeg', self.dec)):
+            column = np.ma.filled(selected[name], np.nan).astype(float)
+            column[resident] = values[rows[resident]]
+            selected[name] = column
+        return selected
+
+    def search_by_name(self, n: str, mode: str = "exact", limit: int = None):
+        return self.rows(self.names.search(n, mode, limit))
+
+    def rows_brighter_than(self, mag_limit: float) -> int: # rows are magnitude-sorted, so this many rows pass the limit
+        return int(np.searchsorted(self.vmag, mag_limit, side='right'))
+
+    def cone(self, ra: float, dec: float, radius: float, mag_limit: float = None):
+        """ (rows, RA, Dec, Vmag) within radius degrees: resident rows first, then any paged rows """
+        row_limit = None if mag_limit is None else self.rows_brighter_than(mag_limit)
+        paged = self.pages is not None and (row_limit is None or row_limit > self.pages.first_row)
+        if self.pages is not None:
+            row_limit = self.pages.first_row if row_limit is None else min(row_limit, self.pages.first_row)
+
+        star_ra, star_dec, vectors, drift = self.positions
+        candidates = self.grid.query(ra, dec, radius + drift, row_limit) # only rows in grid cells touching the cone
+        center = radec_to_vector(ra, dec).astype(np.float32)
+        rows = candidates[vectors[candidates] @ center >= np.float32(np.cos(np.radians(radius)))]
+        found = (rows, star_ra[rows], star_dec[rows], self.vmag[rows])
+        if not paged:
+            return found
+        return tuple(np.concatenate(columns) for columns in zip(found, self.pages.query(ra, dec, radius, mag_limit)))
+
+    def cone_search(self, ra: float, dec: float, radius: float, mag_limit: float = None) -> np.ndarray: # row indices within radius degrees
+        return self.cone(ra, dec, radius, mag_limit)[0]
+
+    def display_name(self, row: int) -> str:
+        name = self.stars['Name'][row]
+        if isinstance(name, bytes):
+            name = name.decode('utf-8')
+        name = str(name)
+        if len(name.replace("-", "").strip()) == 0:
+            name = str(self.stars['TYC'][row])
+        return name
+
+    def bright_star_rows(self, mag_limit: float) -> np.ndarray: # named stars, excluding DSOs
+        named = self.named_rows[:np.searchsorted(self.named_rows, self.rows_brighter_than(mag_limit))]
+        return np.setdiff1d(named, self.dso_rows, assume_unique=True)
+
+    def bright_dso_rows(self, mag_limit: float) -> np.ndarray:
+        return self.dso_rows[:np.searchsorted(self.dso_rows, self.rows_brighter_than(mag_limit))]
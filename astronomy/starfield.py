@@ -1,21 +1,16 @@
 import numpy as np
-import matplotlib
-import matplotlib.pyplot as plt
-from utils import plt_to_img
-from threading import Lock
 from PIL import Image, ImageDraw
+from utils import radec_to_vector
 from observation_context import TelescopeState, TelescopeOptics, TargetState
 from astronomy.catalog import Catalog
+from astronomy.targets import Targets, PROJECTED_DTYPE
+from astronomy.field_cache import FieldCache
+from astronomy.rasterizer import Frame, SIZE, SCALE
+from astronomy.sky_tile import SkyTile, TileCache, TILE_SCALE
 
 def has_alpha(s: str) -> bool:
     return any(c.isalpha() for c in s)
 
-def check_labels(new_pos, labels, min_dist=0.05):
-    for pos in labels:
-        if np.hypot(new_pos[0] - pos[0], new_pos[1] - pos[1]) < min_dist:
-            return False
-    return True
-
 def rotate(x, y, angle_deg):
         angle_rad = np.radians(angle_deg)
         cos_a = np.cos(angle_rad)
@@ -24,46 +19,57 @@ def rotate(x, y, angle_deg):
         y_rot = x * sin_a + y * cos_a
         return x_rot, y_rot
 
-def project_to_view(objects, center_ra, center_dec, radius_deg, rotation=0, filter_by_radius=True):
-        ra0 = np.radians(center_ra)
-        dec0 = np.radians(center_dec)
-        
-        results = []
-        for obj in objects:
-            ra = np.radians(obj['RAdeg'])
-            dec = np.radians(obj['DEdeg'])
-
-            delta_ra = ra - ra0
-            
-            # Gnomonic projection
-            cos_c = np.sin(dec0) * np.sin(dec) + np.cos(dec0) * np.cos(dec) * np.cos(delta_ra)
-            if cos_c <= 0:
-                continue
-                
-            angular_distance = np.degrees(np.arccos(np.clip(cos_c, 0, 1)))
-            if angular_distance > radius_deg and filter_by_radius:
-                continue
-        
-            x = -np.cos(dec) * np.sin(delta_ra) / cos_c 
-            y = (np.cos(dec0) * np.sin(dec) - np.sin(dec0) * np.cos(dec) * np.cos(delta_ra)) / cos_c
-            
-            x, y = rotate(x, y, rotation)
-
-            radius_rad = np.radians(radius_deg)
-            x_norm = x / radius_rad
-            y_norm = y / radius_rad
-            
-            if filter_by_radius and x_norm**2 + y_norm**2 > 1:
-                continue
-            
-            results.append({
-                'object': obj,
-                'x': x_norm,
-                'y': y_norm,
-                'r': angular_distance
-            })
-        
-        return results
+def view_axes(center_ra, center_dec):
+    """ Unit vectors toward the view center, and east and north on its tangent plane """
+    ra0 = np.radians(center_ra)
+    dec0 = np.radians(center_dec)
+    center = np.array([np.cos(dec0) * np.cos(ra0), np.cos(dec0) * np.sin(ra0), np.sin(dec0)])
+    east = np.array([-np.sin(ra0), np.cos(ra0), 0.0])
+    north = np.array([-np.sin(dec0) * np.cos(ra0), -np.sin(dec0) * np.sin(ra0), np.cos(dec0)])
+    return center, east, north
+
+def project_vectors(vectors: np.ndarray, center_ra, center_dec, radius_deg, rotation=0, filter_by_radius=True):
+    """ Gnomonic projection of (3, N) unit vectors around a view center, in one pass.
+    Returns x, y normalized to the view radius, angular distance r in degrees, and the visibility mask """
+    center, east, north = view_axes(center_ra, center_dec)
+
+    cos_c = center @ vectors
+    mask = cos_c > 0 # in front of the tangent plane
+    safe = np.where(mask, cos_c, 1.0)
+    x = -(east @ vectors) / safe
+    y = (north @ vectors) / safe
+    x, y = rotate(x, y, rotation)
+
+    radius_rad = np.radians(radius_deg)
+    x_norm = x / radius_rad
+    y_norm = y / radius_rad
+    r = np.degrees(np.arccos(np.clip(cos_c, 0, 1)))
+    if filter_by_radius:
+        mask &= (r <= radius_deg) & (x_norm**2 + y_norm**2 <= 1)
+    return x_norm, y_norm, r, mask
+
+def project(ra, dec, center_ra, center_dec, radius_deg, rotation=0, filter_by_radius=True):
+    """ project_vectors for RA/Dec arrays (or scalars) in degrees """
+    return project_vectors(radec_to_vector(ra, dec), center_ra, center_dec, radius_deg, rotation, filter_by_radius)
+
+def deproject(x_norm, y_norm, center_ra, center_dec, radius_deg, rotation=0) -> np.ndarray:
+    """ Inverse of project_vectors: (3, N) unit vectors for normalized view coordinates """
+    center, east, north = view_axes(center_ra, center_dec)
+    x, y = rotate(np.asarray(x_norm), np.asarray(y_norm), -rotation)
+    radius_rad = np.radians(radius_deg)
+    vectors = center[:, np.newaxis] - np.outer(east, x * radius_rad) + np.outer(north, y * radius_rad)
+    return vectors / np.linalg.norm(vectors, axis=0)
+
+def project_to_view(targets: Targets, center_ra, center_dec, radius_deg, rotation=0, filter_by_radius=True):
+    x, y, r, mask = project(targets.data['RAdeg'], targets.data['DEdeg'], center_ra, center_dec, radius_deg, rotation, filter_by_radius)
+    index = np.nonzero(mask)[0]
+
+    results = np.empty(len(index), dtype=PROJECTED_DTYPE)
+    results['index'] = index
+    results['x'] = x[index]
+    results['y'] = y[index]
+    results['r'] = r[index]
+    return results
 
 class StarfieldRenderer:
     def __init__(self, catalog: Catalog, telescope_state: TelescopeState, telescope_optics: TelescopeOptics, target_state: TargetState):
@@ -71,59 +77,82 @@ class StarfieldRenderer:
         self.telescope_state = telescope_state
         self.telescope_optics = telescope_optics
         self.target_state = target_state
-        self._render_lock = Lock()
-    
-    def render_view(self, projected, zoom=1):
-        with self._render_lock:
-            fig, ax = plt.subplots()
-            fig.set_facecolor('black')
-            fig.set_dpi(50)
-            ax.set_aspect('equal')
-            ax.set_xlim(-1, 1)
-            ax.set_ylim(-1, 1)
-            circle = plt.Circle((0, 0), 1, color='red', fill=False)
-            ax.add_patch(circle)
-            ax.text(-0.98, 0, 'E', color='white', fontsize=12, va='center', ha='right')
-            ax.text(1.02, 0, 'W', color='white', fontsize=12, va='center', ha='right')
-
-            # Plot objects
-            labeled_positions = set()
-            for item in projected:
-                obj = item['object']
-                x, y = item['x'], item['y']
-                mag = obj['Vmag']
-                is_planet = obj.get('is_planet', False)
-                
-                if is_planet:
-                    # Render planets differently
-                    size = max(8, 20 - mag)  # Planets are generally larger
-                    color = 'yellow' if obj['Name'] == 'SUN' else 'cyan'
-                    marker = 'o' if obj['Name'] != 'SUN' else '*'
-                    ax.plot(x, y, marker, markersize=size, color=color, markeredgecolor='white', markeredgewidth=2)
-                    
-                    label_pos = (round(x + 0.03, 1), round(y, 1))
-                    if label_pos not in labeled_positions:
-                        ax.text(*label_pos, obj['Name'], color='red', fontsize=12, clip_on=True, fontweight='bold')
-                        labeled_positions.add(label_pos)
-                else:
-                    # Render stars normally
-                    size = min(max(1, 25 - mag*2), 15)/(1 if zoom == 1 else (zoom*2 if zoom < 1 else zoom))
-                    ax.plot(x, y, 'o', markersize=size, color='white')
-                    
-                    # Label bright stars
-                    label_pos = (x + 0.05, y + 0.02)
-                    name = str(obj['Name']).strip().replace("--", "").upper()
-                    if len(name) == 0:
-                        name = str(obj['TYC'])
-                    if mag < 8 and has_alpha(name) and check_labels(label_pos, labeled_positions) and len(name) > 0:
-                        ax.text(*label_pos, name, color='orange', fontsize=15, clip_on=True, fontweight='bold')
-                        labeled_positions.add(label_pos)
-
-            ax.set_facecolor('black')
-            plt.axis('off')
-            matplotlib.pyplot.close()
-            return plt_to_img(fig)
+        self.field_cache = FieldCache(catalog.search_by_coordinate)
+        self.tiles = TileCache(self.render_tile)
     
+    def draw_objects(self, frame: Frame, targets: Targets, projected: np.ndarray, zoom=1):
+        is_planets = targets.is_planet
+        for index, x, y, _ in projected:
+            mag = targets.data['Vmag'][index]
+
+            if is_planets[index]:
+                # Render planets differently
+                size = max(8, 20 - mag)  # Planets are generally larger
+                frame.planet(x, y, size, is_sun=targets.name(index) == 'SUN')
+            else:
+                # Render stars normally
+                size = min(max(1, 25 - mag*2), 15)/(1 if zoom == 1 else (zoom*2 if zoom < 1 else zoom))
+                frame.star(x, y, size)
+
+    def draw_labels(self, frame: Frame, targets: Targets, projected: np.ndarray):
+        # Label planets first, then bright stars from the brightest down, so crowded fields keep the best-known names
+        is_planets = targets.is_planet
+        mags = targets.data['Vmag'][projected['index']]
+        planets = is_planets[projected['index']]
+        labelled = planets | (mags < 8)
+        order = np.lexsort((mags[labelled], ~planets[labelled]))
+        for index, x, y, _ in projected[labelled][order]:
+            if is_planets[index]:
+                frame.label(x + 0.03, y, targets.name(index), planet=True)
+                continue
+            # Names are only resolved for stars whose label spot is still free
+            label_pos = (x + 0.05, y + 0.02)
+            if not frame.label_free(*label_pos):
+                continue
+            name = targets.name(index).strip().replace("--", "").upper()
+            if has_alpha(name):
+                frame.label(*label_pos, name)
+
+    def tile_key(self):
+        return self.catalog.tier, self.telescope_optics.get_limiting_magnitude()
+
+    def render_tile(self, ra, dec, r, zoom) -> SkyTile:
+        """ Markers for a square TILE_SCALE times the field around (ra, dec), at roll 0 and the display scale """
+        key = self.tile_key()
+        size = int(round(SIZE * TILE_SCALE))
+        nearby = self.field_cache.get(ra, dec, r * TILE_SCALE * np.sqrt(2), key[1], key=key[0])
+
+        projected = project_to_view(nearby, center_ra=ra, center_dec=dec, radius_deg=r, filter_by_radius=False)
+        edge = TILE_SCALE + 0.1 # markers straddling the tile edge
+        projected = projected[(np.abs(projected['x']) <= edge) & (np.abs(projected['y']) <= edge)]
+        frame = Frame(size, np.zeros((size, size, 3), dtype=np.uint8))
+        self.draw_objects(frame, nearby, projected, zoom)
+
+        rows = projected['index'][nearby.is_planet[projected['index']] | (nearby.data['Vmag'][projected['index']] < 8)]
+        labels = Targets(nearby.data[rows], nearby.resolve_name)
+        return SkyTile(frame.finish().convert("RGB"), ra, dec, r, key, labels)
+
+    def tile_view(self, tile: SkyTile, ra, dec, r, roll) -> Frame:
+        """ The field at (ra, dec, roll) resampled from a tile. Over a field, the map from display to tile pixels
+        is affine to well below a pixel, so it is fitted from three display points """
+        middle, step = SIZE / 2, SIZE / 4
+        u = np.array([middle, middle + step, middle])
+        v = np.array([middle, middle, middle + step])
+        tile_x, tile_y, _, _ = project_vectors(deproject((u - middle) / SCALE, (middle - v) / SCALE, ra, dec, r, roll),
+            tile.ra, tile.dec, r, filter_by_radius=False)
+        tile_u = tile.image.width / 2 + tile_x * SCALE
+        tile_v = tile.image.height / 2 - tile_y * SCALE
+
+        a, b = (tile_u[1] - tile_u[0]) / step, (tile_u[2] - tile_u[0]) / step
+        d, e = (tile_v[1] - tile_v[0]) / step, (tile_v[2] - tile_v[0]) / step
+        coefficients = (a, b, tile_u[0] - (a + b) * middle, d, e, tile_v[0] - (d + e) * middle)
+        view = tile.image.transform((SIZE, SIZE), Image.AFFINE, coefficients, resample=Image.NEAREST)
+
+        frame = Frame.from_tile(np.asarray(view))
+        projected = project_to_view(tile.labels, center_ra=ra, center_dec=dec, radius_deg=r, rotation=roll)
+        self.draw_labels(frame, tile.labels, projected)
+        return frame
+
     def add_navigation_overlay(self, image: Image):
         current_ra, current_dec = self.telescope_state.position
         if current_ra is None:
@@ -140,13 +169,12 @@ class StarfieldRenderer:
         draw = ImageDraw.Draw(overlay)
 
         r = self.telescope_optics.field_radius()
-        projected = project_to_view([{'RAdeg': target_ra, 'DEdeg': target_dec}],
+        x_norm, y_norm, r_deg, in_front = project(target_ra, target_dec,
             center_ra=current_ra, center_dec=current_dec, radius_deg=r, rotation=self.telescope_state.roll, filter_by_radius=False
         )
 
-        if not projected:
+        if not in_front:
             return image, float('inf')
-        _, x_norm, y_norm, r_deg = projected[0].values()
         center_x, center_y = image_size // 2, image_size // 2
 
         if r_deg <= r:
@@ -188,15 +216,12 @@ class StarfieldRenderer:
     def render(self):
         r = self.telescope_optics.field_radius()
         ra, dec = self.telescope_state.position
-        nearby = self.catalog.search_by_coordinate(ra=ra, dec=dec, radius=r, mag_limit=self.telescope_optics.get_limiting_magnitude())
-
-        projected = project_to_view(nearby, center_ra=ra, center_dec=dec, radius_deg=r, rotation=self.telescope_state.roll)
-        stars =  self.render_view(projected, self.telescope_optics.zoom)
+        # cut from a pre-rendered tile; re-rendered in the background as the pointing nears its edge, and on
+        # the spot for a new zoom, a swapped catalog tier or a changed magnitude limit
+        tile = self.tiles.get(ra, dec, r, self.telescope_optics.zoom, key=self.tile_key())
+        stars = self.tile_view(tile, ra, dec, r, self.telescope_state.roll).finish()
 
         dist = 0
         if self.target_state.has_target():
             stars, dist = self.add_navigation_overlay(stars)
         return stars, dist
-
-
-                  
\ No newline at end of file
@@ -0,0 +1,68 @@
+""" Catalog query results backed by NumPy structured arrays instead of per-object dicts """
+import numpy as np
+
+# kind flags
+STAR = 0
+DSO = 1
+PLANET = 2
+MINOR_BODY = 3
+
+TARGET_DTYPE = np.dtype([
+    ('RAdeg', np.float64),
+    ('DEdeg', np.float64),
+    ('Vmag', np.float32),
+    ('kind', np.uint8),
+    ('name', np.int32) # catalog row for STAR/DSO, ephemeris body index otherwise; resolved lazily
+])
+
+PROJECTED_DTYPE = np.dtype([
+    ('index', np.int32), # into the projected Targets
+    ('x', np.float64),
+    ('y', np.float64),
+    ('r', np.float64)
+])
+
+class Targets:
+
+    def __init__(self, data: np.ndarray, resolve_name=None):
+        self.data = data
+        self.resolve_name = resolve_name # (kind, name index) -> str, only called for objects that are labelled
+        self.names = {} # resolved names by position, labels ask again every frame
+
+    @classmethod
+    def from_arrays(cls, ra, dec, vmag=None, kind=STAR, name=-1, resolve_name=None):
+        data = np.empty(np.size(ra), dtype=TARGET_DTYPE)
+        data['RAdeg'] = ra
+        data['DEdeg'] = dec
+        data['Vmag'] = np.nan if vmag is None else vmag
+        data['kind'] = kind
+        data['name'] = name
+        return cls(data, resolve_name)
+
+    @classmethod
+    def concatenate(cls, parts: list, resolve_name=None):
+        return cls(np.concatenate([part.data for part in parts]), resolve_name)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def is_planet(self) -> np.ndarray: # drawn with planet markers: DSOs and major bodies
+        return (self.data['kind'] == DSO) | (self.data['kind'] == PLANET)
+
+    def name(self, i: int) -> str:
+        if self.resolve_name is None:
+            return ""
+        i = int(i)
+        if i not in self.names:
+            self.names[i] = self.resolve_name(int(self.data['kind'][i]), int(self.data['name'][i]))
+        return self.names[i]
+
+    def __getitem__(self, i: int) -> dict: # single-object dict view, for menus and debugging
+        return {
+            'Name': self.name(i),
+            'RAdeg': float(self.data['RAdeg'][i]),
+            'DEdeg': float(self.data['DEdeg'][i]),
+            'Vmag': float(self.data['Vmag'][i]),
+            'is_planet': int(self.data['kind'][i]) in (DSO, PLANET)
+        }
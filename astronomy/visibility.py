@@ -0,0 +1,108 @@
+""" Per-session visibility tables for the target menus, refreshed off the input thread """
+import threading
+import numpy as np
+from astronomy.horizon import HorizonFrame
+
+REFRESH_INTERVAL = 60 # seconds
+SIDEREAL_RATE = 1.00273790935 # sidereal days per solar day
+
+class VisibilityTable:
+    """ One menu's objects in display (alphabetical) order, with current altitude and rise/transit/set.
+    Times are TT Julian dates of the current pass for the minimum visible altitude; NaN when the object
+    never reaches it (rise/set are also NaN for objects that never drop below it) """
+
+    def __init__(self, targets: list, mag_limit: float):
+        self.targets = targets
+        self.mag_limit = mag_limit # deepest magnitude filter this table can answer
+        self.ra = np.array([target['RAdeg'] for target in targets], dtype=np.float64)
+        self.dec = np.array([target['DEdeg'] for target in targets], dtype=np.float64)
+        self.vmag = np.array([target['Vmag'] for target in targets], dtype=np.float64)
+
+        empty = np.full(len(targets), np.nan)
+        self.alt, self.rise, self.transit, self.set = empty, empty, empty, empty
+        self.updated = None
+
+    def move(self, ra: np.ndarray, dec: np.ndarray): # for moving bodies, keep the menu entries in step
+        targets = [dict(target, RAdeg=ra[i], DEdeg=dec[i]) for i, target in enumerate(self.targets)]
+        self.targets, self.ra, self.dec = targets, ra, dec
+
+    def update(self, frame: HorizonFrame, min_altitude: float):
+        alt, _ = frame.altaz(self.ra, self.dec)
+        hour_angle, dec = frame.hadec(self.ra, self.dec)
+
+        lat = np.radians(frame.latitude)
+        dec = np.radians(dec)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cos_h0 = (np.sin(np.radians(min_altitude)) - np.sin(lat) * np.sin(dec)) / (np.cos(lat) * np.cos(dec))
+        half_arc = np.degrees(np.arccos(np.clip(cos_h0, -1.0, 1.0)))
+        half_arc = np.where(cos_h0 > 1.0, np.nan, half_arc) # never rises high enough
+
+        to_days = 1.0 / (360.0 * SIDEREAL_RATE)
+        transit = frame.t.tt - hour_angle * to_days
+        transit = np.where(np.isnan(half_arc), np.nan, transit)
+        rise = np.where(cos_h0 < -1.0, np.nan, transit - half_arc * to_days) # never sets
+        set_ = np.where(cos_h0 < -1.0, np.nan, transit + half_arc * to_days)
+
+        # swap in one step so readers never mix old and new columns
+        self.alt, self.rise, self.transit, self.set, self.updated = alt, rise, transit, set_, frame.t
+
+    def visible(self, min_altitude: float, mag_limit: float = None) -> list:
+        targets, alt, vmag = self.targets, self.alt, self.vmag
+        mask = alt > min_altitude
+        if mag_limit is not None:
+            mask &= vmag <= mag_limit
+        return [targets[i] for i in np.nonzero(mask)[0]]
+
+class TargetVisibility:
+    """ Builds the menu tables (again whenever the catalog changes) and refreshes their dynamic columns on a schedule """
+
+    def __init__(self, build_tables, environment, positions=None, interval: float = REFRESH_INTERVAL):
+        self.build_tables = build_tables # () -> {kind: VisibilityTable}
+        self.positions = positions # optional () -> {kind: (ra, dec)} for moving bodies
+        self.environment = environment
+        self.interval = interval
+        self.tables = {}
+        self.thread = None
+        self.stale = True
+        self.wake = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        tables = None
+        while True:
+            try:
+                if self.stale:
+                    self.stale = False
+                    tables = self.build_tables()
+            except Exception as e:
+                self.stale = True # retry on the next pass
+                print(f"Error building visibility tables: {e}")
+            if tables is not None:
+                try:
+                    self.refresh(tables)
+                    self.tables = tables
+                except Exception as e:
+                    print(f"Error refreshing visibility tables: {e}")
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def rebuild(self): # the underlying catalog changed, rebuild the tables on the next pass
+        self.stale = True
+        self.wake.set()
+
+    def refresh(self, tables: dict):
+        moved = self.positions() if self.positions is not None else {}
+        frame = self.environment.horizon()
+        for kind, table in tables.items():
+            if kind in moved:
+                table.move(*moved[kind])
+            table.update(frame, self.environment.min_visible_altitude)
+
+    def get(self, kind: str, mag_limit: float = None):
+        table = self.tables.get(kind)
+        if table is None or (mag_limit is not None and mag_limit > table.mag_limit):
+            return None
+        return table
@@ -70,5 +70,6 @@ class Camera(ABC):
             img = self.capture() # Adds new image to the queue to be processed by the solver/analyzer
             self.queue.put(img)
             self.camera_state.latest_image = img
+            self.camera_state.frame += 1
             time.sleep(0.01)
         self.stop()
\ No newline at end of file
@@ -2,12 +2,14 @@
 import os
 import time
 import random
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageFont
 from utils import is_pi
+from hardware.framebuffer import FrameBuffer
 if is_pi():
     import board
-    from digitalio import DigitalInOut, Direction
+    from digitalio import DigitalInOut
     from adafruit_rgb_display import st7789
+    from gpiozero import Button
 
     class AdafruitTFTBonnet:
         cs_pin = DigitalInOut(board.CE0)
@@ -27,27 +29,8 @@ if is_pi():
             baudrate=BAUDRATE,
         )
 
-        # Input pins:
-        button_A = DigitalInOut(board.D5)
-        button_A.direction = Direction.INPUT
-
-        button_B = DigitalInOut(board.D6)
-        button_B.direction = Direction.INPUT
-
-        button_L = DigitalInOut(board.D27)
-        button_L.direction = Direction.INPUT
-
-        button_R = DigitalInOut(board.D23)
-        button_R.direction = Direction.INPUT
-
-        button_U = DigitalInOut(board.D17)
-        button_U.direction = Direction.INPUT
-
-        button_D = DigitalInOut(board.D22)
-        button_D.direction = Direction.INPUT
-
-        button_C = DigitalInOut(board.D4)
-        button_C.direction = Direction.INPUT
+        # Input pins (BCM), buttons pull to ground
+        button_pins = {'A': 5, 'B': 6, 'L': 27, 'R': 23, 'U': 17, 'D': 22, 'C': 4}
 
         backlight = DigitalInOut(board.D26)
         backlight.switch_to_output()
@@ -55,35 +38,33 @@ if is_pi():
 
         width = disp.width
         height = disp.height
-        image = Image.new("RGBA", (width, height))
-
-        draw = ImageDraw.Draw(image)
 
         fnt = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
 
         frame = 0
 
-        brightness = 0
-
-        overlay = Image.new("RGBA", (width, height), (0, 0, 0, brightness))
+        def __init__(self):
+            self.framebuffer = FrameBuffer(self.width, self.height)
+            self.buttons = [] # gpiozero Buttons, kept referenced so their edge callbacks stay registered
 
-        # inverted to make more logical sense, 0: Full brightness, 1: HIGHEST
-        def set_brightness(self, b: int):
-            b = max(0.0, min(1.0, b))
-            self.brightness = int((1.0 - b) * 255)
-            self.overlay = Image.new("RGBA", (self.width, self.height), (0, 0, 0, self.brightness))
+        # 0: off, 1: full brightness
+        def set_brightness(self, b: float):
+            self.framebuffer.set_brightness(b)
 
         def draw_screen(self, img):
-            self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=(0, 0, 0))
-
-            if img is not None:
-                resize = img.resize((240, 240))
-                self.image.paste(resize, (0, 0))
-                self.image = Image.alpha_composite(self.image, self.overlay)
-            self.disp.image(self.image)        
-
-        def handle_input(self, last_input):
-            last_input.update(not self.button_A.value, not self.button_B.value, not self.button_L.value, not self.button_R.value, not self.button_U.value, not self.button_D.value, not self.button_C.value)
+            # already rotated and packed to the panel's RGB565, so the driver's own PIL conversion is skipped;
+            # only the windows that changed since the last frame go over SPI
+            self.framebuffer.pack(img)
+            for x0, y0, x1, y1, data in self.framebuffer.changes():
+                self.disp._block(x0, y0, x1, y1, data)
+
+        def attach_input(self, screen_input):
+            # edge interrupts post timestamped events; debounce and key repeat happen in Input
+            for name, pin in self.button_pins.items():
+                button = Button(pin, pull_up=True)
+                button.when_pressed = lambda name=name: screen_input.post(name, True)
+                button.when_released = lambda name=name: screen_input.post(name, False)
+                self.buttons.append(button)
 
 else: # Fake Screen
 
@@ -93,9 +74,7 @@ else: # Fake Screen
             self.height = 240
             print("AdafruitTFTBonnet Not Found, using simulated display")
         def set_brightness(self, b): pass
-        def handle_input(self, last_input): pass
+        def attach_input(self, screen_input): pass
         def draw_screen(self, img):
-            if img is not None:
-                img = img.resize((240, 240))
-            else:
-                print("No image to display")
\ No newline at end of file
+            if img is None:
+                print("No image to display")
@@ -0,0 +1,93 @@
+""" Display-native output: upright 240x240 screens are rotated into the panel's orientation, dimmed and packed
+to RGB565 with a few vectorized passes over preallocated buffers, then sent as-is """
+import numpy as np
+from PIL import Image
+
+WIDTH = 240
+HEIGHT = 240
+TURNS = 1 # counterclockwise quarter turns from upright to the panel: -90 for the bonnet's mounting, +180 for the ST7789 setup
+BAND = 16 # rows per dirty-rectangle band
+WINDOW_COST = 512 # pixels worth of SPI time to open another window; bands closer than this are sent as one
+
+class FrameBuffer:
+
+    def __init__(self, width: int = WIDTH, height: int = HEIGHT, turns: int = TURNS):
+        self.width = width
+        self.height = height
+        self.turns = turns
+        self.level = 256 # brightness, in 1/256ths
+        self.rgb = np.zeros((height, width, 3), dtype=np.uint16) # widened, so dimming and shifting never overflow
+        self.color = np.zeros((height, width), dtype=np.uint16)
+        self.channel = np.zeros((height, width), dtype=np.uint16)
+        self.packed = np.zeros((height, width), dtype='>u2') # big-endian RGB565, the ST7789 RAM format
+        self.sent = None # what the panel shows, None until the first full frame
+        self.diff = np.zeros((height, width), dtype=bool)
+
+    def set_brightness(self, b: float): # 0: off, 1: full
+        self.level = int(round(max(0.0, min(1.0, b)) * 256))
+
+    def pack(self, image: Image.Image) -> memoryview:
+        """ RGB565 bytes of an upright image in panel orientation, valid until the next call """
+        if image is None:
+            self.packed.fill(0)
+            return self.data()
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+
+        np.copyto(self.rgb, np.rot90(np.asarray(image)[..., :3], self.turns)) # rotation and widening in one pass
+        if self.level < 256:
+            self.rgb *= self.level
+            self.rgb >>= 8
+
+        np.bitwise_and(self.rgb[..., 0], 0xF8, out=self.color)
+        self.color <<= 8
+        np.bitwise_and(self.rgb[..., 1], 0xFC, out=self.channel)
+        self.channel <<= 3
+        self.color |= self.channel
+        np.right_shift(self.rgb[..., 2], 3, out=self.channel)
+        self.color |= self.channel
+        self.packed[...] = self.color
+        return self.data()
+
+    def data(self) -> memoryview:
+        return memoryview(self.packed).cast('B')
+
+    def changes(self) -> list:
+        """ (x0, y0, x1, y1, data) panel windows, corners inclusive, covering every pixel that differs from what
+        was last sent; the panel is then assumed to show the packed frame """
+        if self.sent is None:
+            self.sent = self.packed.copy()
+            return [(0, 0, self.width - 1, self.height - 1, self.data())]
+
+        np.not_equal(self.packed, self.sent, out=self.diff)
+        rows = np.flatnonzero(self.diff.any(axis=1))
+        if len(rows) == 0:
+            return []
+
+        # one bounding box per band of changed rows, merged with the previous one when that costs less than a window
+        boxes = []
+        for band in np.unique(rows // BAND):
+            band_rows = rows[(rows >= band * BAND) & (rows < (band + 1) * BAND)]
+            y0, y1 = band_rows[0], band_rows[-1]
+            columns = np.flatnonzero(self.diff[y0:y1 + 1].any(axis=0))
+            box = [columns[0], y0, columns[-1], y1]
+            if boxes:
+                last = boxes[-1]
+                merged = [min(last[0], box[0]), last[1], max(last[2], box[2]), box[3]]
+                if area(merged) - area(last) - area(box) <= WINDOW_COST:
+                    boxes[-1] = merged
+                    continue
+            boxes.append(box)
+
+        windows = []
+        for x0, y0, x1, y1 in boxes:
+            block = self.packed[y0:y1 + 1, x0:x1 + 1]
+            self.sent[y0:y1 + 1, x0:x1 + 1] = block
+            data = memoryview(block).cast('B') if x0 == 0 and x1 == self.width - 1 else block.tobytes() # full rows are contiguous
+            windows.append((int(x0), int(y0), int(x1), int(y1), data))
+        return windows
+
+def area(box) -> int:
+    return (box[2] - box[0] + 1) * (box[3] - box[1] + 1)
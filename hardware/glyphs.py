@@ -0,0 +1,40 @@
+""" Glyph atlas: each character is rasterized by FreeType once per font, then text is composed by pasting the
+cached glyph masks, so redrawn captions and menus never go back to FreeType for characters already seen """
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+@lru_cache(maxsize=1024)
+def text_bbox(text: str, font) -> tuple:
+    """ Same box as ImageDraw.textbbox((0, 0), text, font), measured once per string and font """
+    return ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+
+class GlyphAtlas:
+
+    def __init__(self, font: ImageFont.FreeTypeFont):
+        self.font = font
+        self.ascent = font.getmetrics()[0]
+        self.glyphs = {} # char -> (mask, left, top, advance), offsets from the pen position on the baseline
+
+    def glyph(self, char: str):
+        if char not in self.glyphs:
+            left, top, right, bottom = self.font.getbbox(char, anchor='ls')
+            mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+            ImageDraw.Draw(mask).text((-left, -top), char, font=self.font, fill=255, anchor='ls')
+            self.glyphs[char] = (mask, left, top, self.font.getlength(char))
+        return self.glyphs[char]
+
+    def bbox(self, text: str) -> tuple:
+        return text_bbox(text, self.font)
+
+    def draw(self, image: Image.Image, xy: tuple, text: str, fill):
+        """ ImageDraw.text(xy, text, font, fill) with the default top-left anchor """
+        if "\n" in text: # multiline layout is left to PIL
+            ImageDraw.Draw(image).text(xy, text, font=self.font, fill=fill)
+            return
+        pen = float(xy[0])
+        baseline = int(round(xy[1])) + self.ascent
+        for char in text:
+            mask, left, top, advance = self.glyph(char)
+            if not char.isspace():
+                image.paste(fill, (int(round(pen)) + left, baseline + top), mask)
+            pen += advance
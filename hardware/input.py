@@ -1,73 +1,97 @@
-""" Basic Input Manager for 1.3" Adafruit TFT Bonnet """
+""" Input Manager for 1.3" Adafruit TFT Bonnet.
+Button edges arrive from GPIO interrupts as timestamped events; one thread blocks on the queue and dispatches
+them, debounced, to the current screen's handlers, with accelerating key repeat for held buttons """
+import queue
+import time
+
+BUTTONS = "ABLRUDC"
+DEBOUNCE = 0.03 # seconds an accepted edge is trusted before the line is read again
+REPEAT_DELAY = 0.4 # seconds held before the first repeat
+REPEAT_INTERVAL = 0.1 # seconds between the first repeats
+REPEAT_MIN_INTERVAL = 0.02
+REPEAT_ACCELERATION = 0.85 # each repeat comes this much sooner than the last, down to REPEAT_MIN_INTERVAL
+
 class Input:
 
     controls = {}
 
-    def __init__(self):
+    def __init__(self, debounce: float = DEBOUNCE, repeat_delay: float = REPEAT_DELAY, repeat_interval: float = REPEAT_INTERVAL,
+                 repeat_min_interval: float = REPEAT_MIN_INTERVAL, repeat_acceleration: float = REPEAT_ACCELERATION):
+        self.debounce = debounce
+        self.repeat_delay = repeat_delay
+        self.repeat_interval = repeat_interval
+        self.repeat_min_interval = repeat_min_interval
+        self.repeat_acceleration = repeat_acceleration
+
+        self.events = queue.Queue() # (button, pressed, time)
+        self.level = {button: False for button in BUTTONS} # debounced state
+        self.raw = dict(self.level) # latest edge seen, settled into level once the debounce window ends
+        self.changed_at = {button: float('-inf') for button in BUTTONS}
+        self.down = set() # pressed while the current screen's handlers were set up
+        self.repeats = {} # button -> (next repeat time, interval)
         self.reset()
 
-    def handle(self, control, value):
-        if control["press"] is not None and not control["state"] and value: # Pressed
-            control["press"]()
-        elif control["release"] is not None and control["state"] and not value: #Released
-            control["release"]()
-        elif control["hold"] is not None and value: # Held
-            control["hold"]()
+    def post(self, button: str, pressed: bool, t: float = None): # safe to call from GPIO callback threads
+        self.events.put((button, pressed, time.monotonic() if t is None else t))
+
+    def run(self): # blocks on the queue between events, never polls
+        while True:
+            deadline = self.next_deadline()
+            try:
+                event = self.events.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                event = None
+            try:
+                if event is not None:
+                    self.edge(*event)
+                self.tick(time.monotonic())
+            except Exception as e:
+                print(f"Error handling input: {e}")
+
+    def next_deadline(self):
+        deadlines = [due for due, _ in self.repeats.values()]
+        deadlines += [self.changed_at[button] + self.debounce for button in BUTTONS if self.raw[button] != self.level[button]]
+        return min(deadlines, default=None)
+
+    def edge(self, button: str, pressed: bool, t: float):
+        self.raw[button] = pressed
+        if t - self.changed_at[button] >= self.debounce: # contact bounce right after an accepted edge is settled in tick
+            self.accept(button, pressed, t)
+
+    def tick(self, now: float):
+        for button in BUTTONS:
+            settles = self.changed_at[button] + self.debounce
+            if self.raw[button] != self.level[button] and now >= settles:
+                self.accept(button, self.raw[button], settles)
+
+        for button, (due, interval) in list(self.repeats.items()):
+            if now >= due and button in self.repeats:
+                self.repeats[button] = (due + interval, max(self.repeat_min_interval, interval * self.repeat_acceleration))
+                self.controls[button]["hold"]()
 
-        control["state"] = value
+    def accept(self, button: str, pressed: bool, t: float):
+        if pressed == self.level[button]:
+            return
+        self.level[button] = pressed
+        self.changed_at[button] = t
+        control = self.controls[button]
 
-    def update(self, a, b, l, r, u, d, c): 
-        ct = self.controls
-        self.handle(ct['A'], a)
-        self.handle(ct['B'], b)
-        self.handle(ct['L'], l)
-        self.handle(ct['R'], r)
-        self.handle(ct['U'], u)
-        self.handle(ct['D'], d)
-        self.handle(ct['C'], c)
+        if pressed:
+            self.down.add(button)
+            if control["hold"] is not None: # scheduled first, a handler changing screens cancels it with reset()
+                self.repeats[button] = (t + self.repeat_delay, self.repeat_interval)
+            if control["press"] is not None:
+                control["press"]()
+            elif control["hold"] is not None:
+                control["hold"]()
+        else:
+            self.repeats.pop(button, None)
+            if button in self.down: # releases of presses made on another screen are not passed on
+                self.down.discard(button)
+                if control["release"] is not None:
+                    control["release"]()
 
     def reset(self):
-        self.controls = {
-            'A': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            },
-            'B': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            },
-            'L': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            },
-            'R': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            },
-            'U': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            },
-            'D': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            },
-            'C': {
-                "state": False,
-                "press": None,
-                "release": None,
-                "hold": None
-            }
-        }
\ No newline at end of file
+        self.controls = {button: {"press": None, "release": None, "hold": None} for button in BUTTONS}
+        self.down.clear()
+        self.repeats.clear()
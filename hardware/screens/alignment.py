@@ -60,6 +60,9 @@ class AlignmentScreen(Screen):
         print(f"Target pixel set to {self.current_target}")
         self.ui_state.change_screen(ScreenState.NAVIGATE)
    
+    def version(self):
+        return self.camera_state.frame, self.current_target
+
     def render(self):
         current_target = self.current_target
 
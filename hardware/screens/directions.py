@@ -1,6 +1,6 @@
 import time
 from hardware.screens.screen import Screen
-from utils import distance_descriptor, radec_to_altaz
+from utils import distance_descriptor
 from hardware.state import ScreenState
 
 from hardware.state import UIState
@@ -12,6 +12,7 @@ class DirectionsScreen(Screen):
 
     def __init__(self, ui_state: UIState, screen_input, env: Environment, telescope_state: TelescopeState, target_state: TargetState, solver_state: SolverState):
         super().__init__(ui_state, screen_input)
+        self.env = env
         self.telescope_state = telescope_state
         self.target_state = target_state
         self.solver_state = solver_state
@@ -22,17 +23,25 @@ class DirectionsScreen(Screen):
     def alt_select(self):
         self.ui_state.change_screen(ScreenState.NAVIGATE)
 
+    def version(self):
+        # the solve age is shown to 0.1 s
+        age = time.time() - self.solver_state.last_solved
+        return (self.telescope_state.position, self.target_state.name, self.target_state.ra, self.target_state.dec,
+                float(self.env.time.tt), f"{age:.1f}")
+
     def render(self):
+        return render_many_text(self.lines(), cache=False)
+
+    def lines(self) -> list:
         if self.telescope_state.position is None:
-            return render_many_text(["Waiting for first solve..."])
+            return ["Waiting for first solve..."]
 
         if self.target_state.has_target():
             target_name = self.target_state.name
             target_ra = self.target_state.ra
             target_dec = self.target_state.dec
             ra, dec = self.telescope_state.position
-            alt, az = radec_to_altaz(ra, dec, self.env.astropy_time(), self.env.astropy_location)
-            target_alt, target_az = radec_to_altaz(target_ra, target_dec, self.env.astropy_time(), self.env.astropy_location)
+            (alt, target_alt), (az, target_az) = self.env.horizon().altaz([ra, target_ra], [dec, target_dec])
 
             delta_x = target_az - az
             delta_y = target_alt - alt
@@ -40,7 +49,7 @@ class DirectionsScreen(Screen):
             north = f"North: {distance_descriptor(delta_y)} ({delta_y:.2f}°)"
             east = f"East: {distance_descriptor(delta_x)} ({delta_x:.2f}°)"
 
-            return render_many_text(['\n', 'CURRENT TARGET:', target_name, '\n', north, '\n', east, '\n', f"Last Solve: {(time.time()-self.solver_state.last_solved):.1f}s"])
-        return render_many_text(["No target set."])
+            return ['\n', 'CURRENT TARGET:', target_name, '\n', north, '\n', east, '\n', f"Last Solve: {(time.time()-self.solver_state.last_solved):.1f}s"]
+        return ["No target set."]
 
     
@@ -24,6 +24,9 @@ class FocusScreen(Screen):
     def alt_select(self):
         self.ui_state.change_screen(ScreenState.MAIN_MENU)
 
+    def version(self):
+        return self.camera_state.frame, analyzer.fwhm_values[-1] if analyzer.fwhm_values else None, analyzer.lowest_fwhm
+
     def render(self):
         if self.camera_state.latest_image is None:
             return render_many_text(["Waiting for first image..."])
@@ -1,3 +1,4 @@
+import time
 import pytz
 from hardware.screens.screen import Screen
 from hardware.state import ScreenState
@@ -27,7 +28,19 @@ class InfoScreen(Screen):
     def alt_select(self):
         self.ui_state.change_screen(ScreenState.MAIN_MENU)
 
+    def version(self):
+        # the clock lines tick once a second
+        optics = self.telescope_optics
+        return (self.telescope_state.position, float(self.environment.time.tt), int(time.time()),
+                optics.eyepiece, optics.eyepiece_fov, optics.aperture, optics.focal_length,
+                analyzer.fwhm_values[-1] if analyzer.fwhm_values else None,
+                analyzer.background_levels[-1] if analyzer.background_levels else None,
+                analyzer.noise_levels[-1] if analyzer.noise_levels else None)
+
     def render(self):
+        return render_many_text(self.lines(), cache=False)
+
+    def lines(self) -> list:
         t = self.environment.time
         location = self.environment.location
 
@@ -59,4 +72,4 @@ class InfoScreen(Screen):
         screen_text.append(f"FWHM: {analyzer.fwhm_values[-1] if analyzer.fwhm_values else 100.0:.2f}")
         screen_text.append(f"BG+NOISE: {analyzer.background_levels[-1] if analyzer.background_levels else 100.0:.2f}+{analyzer.noise_levels[-1] if analyzer.noise_levels else 100.0:.2f}")
 
-        return render_many_text(screen_text)
\ No newline at end of file
+        return screen_text
\ No newline at end of file
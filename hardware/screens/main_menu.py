@@ -29,6 +29,9 @@ class MainMenu(Screen):
     def alt_select(self):
         self.ui_state.change_screen(ScreenState.INFO)
 
+    def version(self):
+        return self.selected_y
+
     def render(self):
         return render_menu(self.title, self.options, self.selected_y)
     
@@ -46,6 +46,12 @@ class NavigationScreen(Screen):
     def select(self):
         self.ui_state.change_screen(ScreenState.DIRECTIONS)
 
+    def version(self):
+        # the caption shows the solve age to 0.1 s; the whole-second tick picks up tiles re-rendered in the background
+        age = time.time() - self.solver_state.last_solved
+        return (self.telescope_state.position, self.telescope_state.roll, self.telescope_optics.zoom,
+                self.target_state.ra, self.target_state.dec, f"{age:.1f}", int(time.monotonic()))
+
     def render(self):
         image = Image.new("RGB", (240, 240))
         if self.telescope_state.position is None:
@@ -14,4 +14,9 @@ class Screen(ABC):
 
     @abstractmethod
     def render(self):
-        pass
\ No newline at end of file
+        pass
+
+    def version(self):
+        """ Anything that changes whenever render() would draw something different, compared with ==.
+        None means unknown, and the screen is redrawn every frame """
+        return None
\ No newline at end of file
@@ -42,5 +42,8 @@ class TargetList(Screen):
     def alt_select(self):
         self.ui_state.change_screen(ScreenState.MAIN_MENU)
 
+    def version(self):
+        return self.selected_y
+
     def render(self):
         return render_menu(f"Catalog?", self.options, self.selected_y)
\ No newline at end of file
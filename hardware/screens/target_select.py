@@ -70,6 +70,9 @@ class TargetSelect(Screen):
     def alt_select(self):
         self.ui_state.change_screen(ScreenState.MAIN_MENU)
 
+    def version(self):
+        return self.selected_y, self.mag_limit, self.target_state.catalog_filter, self.names
+
     def render(self):
         return render_menu(f"{f'>{self.mag_limit} ' if self.target_state.catalog_filter != 2 else ''}Target?", self.names, self.selected_y)
 
@@ -1,4 +1,3 @@
-import time
 from enum import Enum
 
 class ScreenState(Enum):
@@ -20,6 +19,4 @@ class UIState:
     def change_screen(self, screen: ScreenState):
         self.state = screen
         self.change_input(screen)
-        
-        time.sleep(0.5) # prevent multiple page changes
 
@@ -41,14 +41,18 @@ class UIManager:
         return self.current_screen().render()
     
     def handle_input(self):
-        while True:
-            self.screen.handle_input(self.screen_input)
-            time.sleep(0.01)
+        self.screen.attach_input(self.screen_input)
+        self.screen_input.run()
 
     def draw_screen(self):
         
         if os.name == 'nt' or os.uname().nodename != "rpi":
             return
+        shown = None # (screen, version) last drawn
         while True:
-            self.screen.draw_screen(self.render())
+            screen = self.current_screen()
+            version = screen.version()
+            if version is None or shown != (screen, version): # static screens are neither re-rendered nor re-sent
+                self.screen.draw_screen(screen.render())
+                shown = (screen, version)
             time.sleep(0.01)
\ No newline at end of file
@@ -38,7 +38,7 @@ def build_solver(solver_state: SolverState, telescope_state: TelescopeState):
         return FakeSolver(solver_state, telescope_state)
 
 def try_set_target(catalog: Catalog, target_state: TargetState, name: str):
-    target = catalog.search_by_name(name, False)
+    target = catalog.search_by_name(name)
     if len(target) > 0:
         target = target[0]
         target_state.set_target(target['RAdeg'], target['DEdeg'], target['Name'])
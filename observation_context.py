@@ -5,13 +5,14 @@ import numpy as np
 from dataclasses import dataclass
 from skyfield.api import Time
 from astropy.coordinates import EarthLocation
-from utils import radec_to_altaz, BASE_DIR
+from utils import BASE_DIR
 from skyfield.api import wgs84, load
 import astropy.units as u
 import os
 from PIL import Image
 from astronomy.stellarium import StellariumConnection
 from astropy.time import Time as AstropyTime
+from astronomy.horizon import HorizonFrame
 
 # File Locations
 offset_file = os.path.join(BASE_DIR, "offset.npy")
@@ -28,6 +29,7 @@ class CameraState:
     exposure: float = 1.0
     gain: float = 8.0
     latest_image: Image = None
+    frame: int = 0 # counts latest_image updates
     fake_image_test: bool = False
 
 @dataclass
@@ -129,11 +131,18 @@ class Environment:
     astropy_location = EarthLocation(lat=rochesterLat*u.deg, lon=rochesterLong*u.deg, height=rochesterElevation*u.m)
     skyfield_location = wgs84.latlon(rochesterLat, rochesterLong, rochesterElevation)
 
+    _horizon = None # HorizonFrame for the current time step
+
     def astropy_time(self):
         return AstropyTime(self.time.tt, format='jd', scale='tt')
+
+    def horizon(self) -> HorizonFrame: # rebuilt only when the time step changes
+        if self._horizon is None or self._horizon.t is not self.time:
+            self._horizon = HorizonFrame(self.time, self.skyfield_location.latitude.degrees, self.skyfield_location.longitude.degrees)
+        return self._horizon
     
     def is_target_visible(self, ra: float, dec: float):
-        alt, az = radec_to_altaz(ra, dec, self.astropy_time(), self.astropy_location)
+        alt, az = self.horizon().altaz(ra, dec)
         return alt > self.min_visible_altitude
 
 class ObservationContext:
@@ -0,0 +1,30 @@
+""" HorizonFrame against the astropy transform it replaced in the per-frame paths """
+import numpy as np
+import pytest
+from astropy.coordinates import EarthLocation
+import astropy.units as u
+from skyfield.api import load
+from astronomy.horizon import HorizonFrame
+from utils import radec_to_altaz
+
+LATITUDE = 43.1566
+LONGITUDE = -77.6088
+TOLERANCE = 1.0 / 60.0 # degrees
+
+ts = load.timescale()
+location = EarthLocation(lat=LATITUDE * u.deg, lon=LONGITUDE * u.deg, height=150 * u.m)
+
+def separation(alt1, az1, alt2, az2):
+    alt1, az1, alt2, az2 = (np.radians(value) for value in (alt1, az1, alt2, az2))
+    cos_distance = np.sin(alt1) * np.sin(alt2) + np.cos(alt1) * np.cos(alt2) * np.cos(az1 - az2)
+    return np.degrees(np.arccos(np.clip(cos_distance, -1.0, 1.0)))
+
+@pytest.mark.parametrize("t", [ts.utc(2025, 1, 15, 3, 0), ts.utc(2025, 7, 4, 22, 30), ts.utc(2030, 11, 20, 12, 0)], ids=str)
+def test_altaz_matches_astropy(t):
+    ra, dec = np.meshgrid(np.arange(0.0, 360.0, 30.0), np.arange(-80.0, 90.0, 20.0))
+    ra, dec = ra.ravel(), dec.ravel()
+
+    alt, az = HorizonFrame(t, LATITUDE, LONGITUDE).altaz(ra, dec)
+    expected_alt, expected_az = radec_to_altaz(ra, dec, t.to_astropy(), location)
+
+    assert np.max(separation(alt, az, expected_alt, expected_az)) < TOLERANCE
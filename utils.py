@@ -67,6 +67,13 @@ def radec_to_vector(ra_deg:float, dec_deg:float):
 
     return np.array([x, y, z])
 
+def radec_to_unit_vectors(ra_deg, dec_deg, dtype=np.float32) -> np.ndarray:
+    ra = np.radians(np.asarray(ra_deg, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_deg, dtype=np.float64))
+    cos_dec = np.cos(dec)
+
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec))).astype(dtype) # (N, 3)
+
 def solve_rotation(camera: Tuple[float, float], telescope: Tuple[float, float], camera_roll: float) -> np.ndarray:
     cam_vec = radec_to_vector(camera[0], camera[1])
     tel_vec = radec_to_vector(telescope[0], telescope[1])